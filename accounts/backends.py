@@ -0,0 +1,47 @@
+"""
+Authentication backend reading the logged-in user from the cache.
+
+Django loads the user of every authenticated request by primary key. Together
+with the cached_db sessions (see SESSION_ENGINE), reading it from the cache
+lets the page views of a logged-in user run no query for their session and
+user in the common case.
+
+A cached user is deleted as soon as the user is saved or deleted (see
+accounts.signals): password changes and resets, admin promotions and
+demotions, account deletions... The session auth hash, derived from the
+password, is therefore always checked against the current password, and
+changing it still logs out the other sessions.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def user_cache_key(user_id):
+    return f'accounts:user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose get_user() is served from the cache"""
+
+    def get_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user
+
+    async def aget_user(self, user_id):
+        key = user_cache_key(user_id)
+        user = await cache.aget(key)
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is not None:
+                await cache.aset(key, user, settings.USER_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:10
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+# Prefix search on PostgreSQL, see admin_panel.search
+PATTERN_INDEXES = [
+    ('user_last_name_like_idx', 'last_name'),
+    ('user_first_name_like_idx', 'first_name'),
+    ('user_username_like_idx', 'username'),
+]
+
+
+def create_pattern_indexes(apps, schema_editor):
+    """Index the lowercased names for LIKE 'prefix%' searches, on PostgreSQL only"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('accounts', 'CustomUser')._meta.db_table
+    for name, column in PATTERN_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX {schema_editor.quote_name(name)} ON {schema_editor.quote_name(table)} '
+            f'(LOWER({schema_editor.quote_name(column)}) text_pattern_ops)'
+        )
+
+
+def drop_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in PATTERN_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_add_parent_name_index'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(django.db.models.functions.text.Lower('last_name'), name='user_last_name_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(django.db.models.functions.text.Lower('first_name'), name='user_first_name_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(django.db.models.functions.text.Lower('username'), name='user_username_key_idx'),
+        ),
+        migrations.RunPython(create_pattern_indexes, drop_pattern_indexes),
+    ]
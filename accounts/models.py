@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils.translation import gettext_lazy as _
 
 
@@ -11,6 +12,17 @@ class CustomUser(AbstractUser):
     class Meta:
         verbose_name = _('Utilisateur')
         verbose_name_plural = _('Utilisateurs')
+        indexes = [
+            # Parents list of the admin panel; a partial index, as booleans are
+            # not indexable on their own
+            models.Index(fields=['last_name', 'first_name'], condition=models.Q(is_parent=True), name='user_parent_name_idx'),
+            # Prefix search of the parents list, see admin_panel.search. Not
+            # partial: SQLite only combines the indexes of an OR (one per
+            # searched column) when they hold every row
+            models.Index(Lower('last_name'), name='user_last_name_key_idx'),
+            models.Index(Lower('first_name'), name='user_first_name_key_idx'),
+            models.Index(Lower('username'), name='user_username_key_idx'),
+        ]
 
     def __str__(self):
         return self.username
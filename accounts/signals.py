@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .backends import invalidate_cached_user
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """The cached user of the sessions of this user is out of date
+
+    Covers change_password_view, reset_parent_password, toggle_admin_status
+    and delete_parent_account, as well as the Django admin. Deleted once
+    committed, so that a concurrent request cannot cache the user again from
+    the data before the change.
+    """
+    user_id = instance.pk
+    transaction.on_commit(lambda: invalidate_cached_user(user_id))
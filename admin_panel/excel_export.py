@@ -0,0 +1,210 @@
+"""
+Excel export of the results of a date group.
+
+The whole export runs a constant number of queries, whatever the number of
+dates and children: the date options, their tallies (summary sheet) and the
+"yes" votes with their children (one sheet per date), or the results snapshot
+of a closed group. The age of each child on each date, and their age band,
+are computed by the database, which also returns the children of a date sorted
+by band and age. The workbook is built with openpyxl's write-only mode, which
+streams each sheet to a temporary file instead of keeping every cell in memory.
+"""
+from collections import defaultdict
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+from children.ages import AGE_BAND_LABELS, UNDER_SIX
+from voting.models import TimeSlotTally, Vote
+from voting.snapshots import get_snapshot_statistics
+from .staffing import STAFF_RATIOS
+
+PERIODS = ('morning', 'lunch', 'afternoon')
+
+THIN_BORDER = Border(left=Side(style='thin'),
+                     right=Side(style='thin'),
+                     top=Side(style='thin'),
+                     bottom=Side(style='thin'))
+CENTER = Alignment(horizontal='center')
+CENTER_MIDDLE = Alignment(horizontal='center', vertical='center')
+BOLD = Font(bold=True)
+TITLE_FONT = Font(bold=True, size=14)
+SEPARATOR_FILL = PatternFill(start_color='D9D9D9', end_color='D9D9D9', fill_type='solid')
+
+DATE_SHEET_WIDTH = 11
+DATE_SHEET_FIXED_WIDTHS = {'E': 3.5, 'F': 3.5, 'G': 3.5, 'H': 10, 'I': 27, 'J': 10, 'K': 27}
+
+
+def _cell(ws, value, font=None, fill=None, border=THIN_BORDER, alignment=CENTER_MIDDLE):
+    cell = WriteOnlyCell(ws, value=value)
+    if font:
+        cell.font = font
+    if fill:
+        cell.fill = fill
+    if border:
+        cell.border = border
+    if alignment:
+        cell.alignment = alignment
+    return cell
+
+
+def write_results_workbook(date_group, fileobj):
+    """Write the results workbook of a date group to a binary file object
+
+    Ages are computed as of each date. Closed groups are exported from their
+    results snapshot.
+    """
+    if date_group.status == 'closed':
+        date_options, tallies, yes_votes = _load_snapshot_results(date_group)
+    else:
+        date_options, tallies, yes_votes = _load_results(date_group)
+
+    wb = Workbook(write_only=True)
+    _write_summary_sheet(wb, date_group, date_options, tallies)
+    for date_option in date_options:
+        _write_date_sheet(wb, date_option, yes_votes.get(date_option.id, {}))
+    wb.save(fileobj)
+
+
+def _add_yes_vote(yes_votes, vote):
+    row = yes_votes[vote.time_slot.date_option_id].setdefault(vote.child.id, {
+        'child': vote.child,
+        'age': vote.child_age,
+        'band': vote.child_age_band,
+        'periods': set(),
+    })
+    row['periods'].add(vote.time_slot.period)
+
+
+def _load_results(date_group):
+    """Return the date options, the tallies by (date_option_id, period) and the
+    "yes" votes as {date_option_id: {child_id: row}}, each row holding the
+    child, their age and age band on the date and the set of their periods,
+    youngest first in each band"""
+    date_options = list(date_group.date_options.all().order_by('date'))
+    tallies = {
+        (tally.time_slot.date_option_id, tally.time_slot.period): tally
+        for tally in TimeSlotTally.objects.filter(
+            time_slot__date_option__date_group=date_group
+        ).select_related('time_slot')
+    }
+
+    yes_votes = defaultdict(dict)
+    for vote in Vote.objects.filter(
+        time_slot__date_option__date_group=date_group, choice='yes'
+    ).select_related('child', 'time_slot').with_child_age().order_by(
+        'child_age_band', '-child__birth_date', 'child__last_name', 'child__first_name'
+    ):
+        _add_yes_vote(yes_votes, vote)
+    return date_options, tallies, yes_votes
+
+
+def _load_snapshot_results(date_group):
+    """Same as _load_results(), read from the frozen results of a closed group"""
+    date_options = {}
+    tallies = {}
+    yes_votes = defaultdict(dict)
+    for stat in get_snapshot_statistics(date_group):
+        option = date_options.setdefault(stat['option'].id, stat['option'])
+        period = stat['time_slot'].period
+        tallies[(option.id, period)] = TimeSlotTally(yes_count=stat['yes'], no_count=stat['no'], maybe_count=stat['maybe'])
+        for vote in stat['yes_votes']:
+            _add_yes_vote(yes_votes, vote)
+
+    # Same order as the query of _load_results()
+    for option_id, rows in yes_votes.items():
+        ordered = sorted(rows.values(), key=lambda row: (row['child'].last_name, row['child'].first_name))
+        ordered.sort(key=lambda row: row['child'].birth_date, reverse=True)
+        ordered.sort(key=lambda row: row['band'])
+        yes_votes[option_id] = {row['child'].id: row for row in ordered}
+    return list(date_options.values()), tallies, yes_votes
+
+
+def _write_summary_sheet(wb, date_group, date_options, tallies):
+    ws = wb.create_sheet(title="Résumé")
+    ws.column_dimensions['A'].width = 13
+    ws.merged_cells.add('B2:C2')
+    ws.merged_cells.add('D2:E2')
+    ws.merged_cells.add('F2:G2')
+
+    ws.append([_cell(ws, date_group.title, font=TITLE_FONT, border=None, alignment=None)])
+    header1 = ['', 'Matin', '', 'Repas', '', 'Après-midi', '']
+    header2 = ['Date', 'Oui', 'Non', 'Oui', 'Non', 'Oui', 'Non']
+    ws.append([_cell(ws, value, font=BOLD, alignment=CENTER) for value in header1])
+    ws.append([_cell(ws, value, font=BOLD, alignment=CENTER) for value in header2])
+
+    empty_tally = TimeSlotTally()
+    for date_option in date_options:
+        row = [date_option.date.strftime('%d-%b-%Y')]
+        for period in PERIODS:
+            tally = tallies.get((date_option.id, period), empty_tally)
+            row += [tally.yes_count, tally.no_count]
+        ws.append([_cell(ws, value, alignment=CENTER) for value in row])
+
+
+def _write_date_sheet(wb, date_option, children_rows):
+    date_str = date_option.date.strftime('%d-%b-%Y')
+    ws = wb.create_sheet(title=date_str)
+
+    headers1 = ['', '', '', date_str, 'Réservation', '', '', 'arrivée', '', 'départ']
+    headers2 = ['', '', '#', 'Nom', 'M', 'R', 'AM', 'heure', 'signature', 'heure', 'signature']
+    rows = [(headers1, BOLD, None), (headers2, BOLD, None)]
+
+    # Add rows for each child, youngest first, with a separator row before the
+    # first child of the "+6 ans" band
+    separator_row = None
+    offset = 0
+    totals = dict.fromkeys(PERIODS, 0)
+    for i, row in enumerate(children_rows.values()):
+        if separator_row is None and row['band'] != UNDER_SIX:
+            offset = i
+            rows.append(([''] * len(headers1), None, SEPARATOR_FILL))
+            separator_row = len(rows)
+
+        periods = row['periods']
+        for period in periods:
+            totals[period] += 1
+        supervision_rate = (i + 1 - offset) / STAFF_RATIOS[row['band']]
+        rows.append(([
+            AGE_BAND_LABELS[row['band']],
+            f'{supervision_rate:.2f}',
+            i + 1 - offset,
+            f"{row['child']} ({row['age']} ans)",
+            '✓' if 'morning' in periods else '',
+            '✓' if 'lunch' in periods else '',
+            '✓' if 'afternoon' in periods else '',
+        ], None, None))
+    last_child_row = len(rows)
+
+    # Add a "Total" row under the last child row
+    rows.append((["Total", "", "", "", totals['morning'], totals['lunch'], totals['afternoon']], None, None))
+
+    # Merge the age band cells of each group of children
+    first_child_row = 3
+    young_end = separator_row - 1 if separator_row else last_child_row
+    if young_end >= first_child_row:
+        ws.merged_cells.add(f'A{first_child_row}:A{young_end}')
+    if separator_row and last_child_row > separator_row:
+        ws.merged_cells.add(f'A{separator_row + 1}:A{last_child_row}')
+    ws.merged_cells.add('E1:G1')
+    ws.merged_cells.add('H1:I1')
+    ws.merged_cells.add('J1:K1')
+
+    # Column widths must be set before the rows are streamed
+    for column in range(1, DATE_SHEET_WIDTH + 1):
+        letter = get_column_letter(column)
+        if letter in DATE_SHEET_FIXED_WIDTHS:
+            ws.column_dimensions[letter].width = DATE_SHEET_FIXED_WIDTHS[letter]
+            continue
+        max_length = max(
+            (len(str(values[column - 1])) for values, font, fill in rows
+             if len(values) >= column and values[column - 1]),
+            default=0,
+        )
+        ws.column_dimensions[letter].width = min(max_length + 2, 50)
+
+    for values, font, fill in rows:
+        padded = list(values) + [None] * (DATE_SHEET_WIDTH - len(values))
+        ws.append([_cell(ws, value, font=font, fill=fill) for value in padded])
@@ -0,0 +1,155 @@
+"""
+Background Excel export jobs.
+
+An export is identified by a cache key derived from the date group and its
+data version (bumped on every vote, date or status change); the ages of the
+children being computed as of each date, it does not depend on the day of the
+export. The workbook is built once per key, outside the request
+worker, and stored under settings.EXPORTS_ROOT; later downloads of an unchanged
+group are served straight from that file.
+
+Jobs run in a background thread started once the request's transaction is
+committed. A job left pending for STALE_JOB_DELAY is started again by the next
+export request; pending or interrupted jobs are also processed by
+``python manage.py run_export_jobs``, run by a systemd timer (see systemd/).
+"""
+import logging
+import os
+import tempfile
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import ExportJob
+
+logger = logging.getLogger(__name__)
+
+# A job still pending or running after this delay is considered interrupted
+STALE_JOB_DELAY = timedelta(minutes=10)
+
+
+def export_cache_key(date_group):
+    """Key of the export of a date group in its current state"""
+    return f'group-{date_group.pk}-v{date_group.data_version}'
+
+
+def export_path(file_name):
+    return os.path.join(settings.EXPORTS_ROOT, file_name)
+
+
+def get_current_job(date_group):
+    """Return the latest job for the current data version of a group, if any"""
+    return ExportJob.objects.filter(
+        date_group=date_group, cache_key=export_cache_key(date_group)
+    ).first()
+
+
+async def aget_current_job(date_group):
+    """Async version of get_current_job(), for the async results view"""
+    return await ExportJob.objects.filter(
+        date_group=date_group, cache_key=export_cache_key(date_group)
+    ).afirst()
+
+
+def request_export(date_group, user):
+    """Return an up-to-date export job for a date group, starting one if needed
+
+    The date group is locked while looking for a job, so that concurrent
+    requests reuse the same job instead of queueing one each.
+    """
+    from voting.models import DateGroup
+
+    with transaction.atomic():
+        list(DateGroup.objects.select_for_update().filter(pk=date_group.pk).values_list('pk', flat=True))
+        job = get_current_job(date_group)
+        if job is not None and job.status == 'pending' and job.created_at < timezone.now() - STALE_JOB_DELAY:
+            # Its thread never ran (or the server restarted first): start it again,
+            # the job being claimed only once
+            transaction.on_commit(lambda: start_export_job(job.pk))
+            return job
+        if job is not None and job.status in ('pending', 'running'):
+            return job
+        if job is not None and job.status == 'done' and os.path.exists(export_path(job.file_name)):
+            return job
+
+        job = ExportJob.objects.create(
+            date_group=date_group,
+            cache_key=export_cache_key(date_group),
+            requested_by=user,
+        )
+        transaction.on_commit(lambda: start_export_job(job.pk))
+    return job
+
+
+def start_export_job(job_id):
+    """Run an export job in a background thread"""
+    thread = threading.Thread(target=run_export_job, args=(job_id,), daemon=True)
+    thread.start()
+    return thread
+
+
+def run_export_job(job_id):
+    """Build the workbook of an export job and store it on disk"""
+    from .excel_export import write_results_workbook
+
+    close_old_connections()
+    try:
+        # Claim the job, so that it is only run once
+        claimed = ExportJob.objects.filter(pk=job_id, status='pending').update(
+            status='running', started_at=timezone.now()
+        )
+        if not claimed:
+            return
+
+        job = ExportJob.objects.select_related('date_group').get(pk=job_id)
+        file_name = f'{job.cache_key}.xlsx'
+        path = export_path(file_name)
+        os.makedirs(settings.EXPORTS_ROOT, exist_ok=True)
+        tmp_path = None
+        try:
+            # Write to a temporary file of its own first, so that a partial
+            # workbook is never served, even when two jobs export the same key
+            with tempfile.NamedTemporaryFile(
+                dir=settings.EXPORTS_ROOT, prefix=f'{job.cache_key}-', suffix='.tmp', delete=False
+            ) as fileobj:
+                tmp_path = fileobj.name
+                write_results_workbook(job.date_group, fileobj)
+            os.replace(tmp_path, path)
+        except Exception as exc:
+            logger.exception('Export job %s failed', job_id)
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            ExportJob.objects.filter(pk=job_id).update(
+                status='failed', error=str(exc), finished_at=timezone.now()
+            )
+            return
+
+        ExportJob.objects.filter(pk=job_id).update(
+            status='done', file_name=file_name, finished_at=timezone.now()
+        )
+        remove_outdated_exports(job)
+    finally:
+        close_old_connections()
+
+
+def remove_outdated_exports(job):
+    """Delete the files and jobs of older exports of the same date group"""
+    outdated = ExportJob.objects.filter(
+        date_group_id=job.date_group_id, created_at__lt=job.created_at
+    ).exclude(cache_key=job.cache_key).exclude(status__in=['pending', 'running'])
+    for file_name in outdated.exclude(file_name='').values_list('file_name', flat=True):
+        try:
+            os.remove(export_path(file_name))
+        except FileNotFoundError:
+            pass
+    outdated.delete()
+
+
+def requeue_stale_jobs():
+    """Put back in the queue the jobs interrupted while running"""
+    return ExportJob.objects.filter(
+        status='running', started_at__lt=timezone.now() - STALE_JOB_DELAY
+    ).update(status='pending', started_at=None)
@@ -1,3 +1,6 @@
+import datetime
+import re
+
 from django import forms
 from django.forms import inlineformset_factory
 from django.utils.translation import gettext_lazy as _
@@ -60,6 +63,122 @@ DateOptionFormSet = inlineformset_factory(
 )
 
 
+class DateRecurrenceForm(forms.Form):
+    """Recurring dates of a date group, such as every Wednesday of a school term"""
+
+    # Maximum number of dates generated at once
+    MAX_DATES = 200
+
+    WEEKDAY_CHOICES = [
+        (0, _('Lundi')),
+        (1, _('Mardi')),
+        (2, _('Mercredi')),
+        (3, _('Jeudi')),
+        (4, _('Vendredi')),
+        (5, _('Samedi')),
+        (6, _('Dimanche')),
+    ]
+
+    start_date = forms.DateField(
+        label=_('Du'),
+        required=False,
+        widget=DateInput(attrs={'class': 'form-control'}),
+    )
+    end_date = forms.DateField(
+        label=_('Au'),
+        required=False,
+        widget=DateInput(attrs={'class': 'form-control'}),
+    )
+    weekdays = forms.TypedMultipleChoiceField(
+        label=_('Chaque'),
+        choices=WEEKDAY_CHOICES,
+        coerce=int,
+        required=False,
+        widget=forms.CheckboxSelectMultiple,
+    )
+    excluded_dates = forms.CharField(
+        label=_('Sauf les dates'),
+        required=False,
+        help_text=_('Dates à exclure (jours fériés...), séparées par des virgules ou des retours à la ligne, au format JJ/MM/AAAA.'),
+        widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 2}),
+    )
+
+    def clean_excluded_dates(self):
+        dates = set()
+        date_field = forms.DateField()
+        for value in re.split(r'[,;\s]+', self.cleaned_data['excluded_dates'].strip()):
+            if not value:
+                continue
+            try:
+                dates.add(date_field.to_python(value))
+            except forms.ValidationError:
+                raise forms.ValidationError(_('Date invalide : %(value)s'), params={'value': value})
+        return dates
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+        weekdays = cleaned_data.get('weekdays')
+        if not (start_date or end_date or weekdays):
+            return cleaned_data
+        if not (start_date and end_date and weekdays):
+            raise forms.ValidationError(_('Indiquez les dates de début et de fin et au moins un jour de la semaine.'))
+        if end_date < start_date:
+            raise forms.ValidationError(_('La date de fin doit être postérieure à la date de début.'))
+        if len(self.get_dates()) > self.MAX_DATES:
+            raise forms.ValidationError(
+                _('La récurrence génère plus de %(max)s dates.'), params={'max': self.MAX_DATES}
+            )
+        return cleaned_data
+
+    def get_dates(self):
+        """Return the generated dates, an empty list when no recurrence is given"""
+        start_date = self.cleaned_data.get('start_date')
+        end_date = self.cleaned_data.get('end_date')
+        weekdays = set(self.cleaned_data.get('weekdays') or [])
+        excluded_dates = self.cleaned_data.get('excluded_dates') or set()
+        if not (start_date and end_date and weekdays):
+            return []
+        dates = []
+        date = start_date
+        while date <= end_date:
+            if date.weekday() in weekdays and date not in excluded_dates:
+                dates.append(date)
+            date += datetime.timedelta(days=1)
+        return dates
+
+
+class StaffingPlanForm(forms.Form):
+    """Date groups and period covered by the staffing planner"""
+
+    date_groups = forms.ModelMultipleChoiceField(
+        label=_('Groupes de dates'),
+        queryset=DateGroup.objects.order_by('-created_at'),
+        required=False,
+        help_text=_('Par défaut, les groupes actifs.'),
+        widget=forms.CheckboxSelectMultiple,
+    )
+    start_date = forms.DateField(
+        label=_('Du'),
+        required=False,
+        widget=DateInput(attrs={'class': 'form-control'}),
+    )
+    end_date = forms.DateField(
+        label=_('Au'),
+        required=False,
+        widget=DateInput(attrs={'class': 'form-control'}),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+        if start_date and end_date and end_date < start_date:
+            raise forms.ValidationError(_('La date de fin doit être postérieure à la date de début.'))
+        return cleaned_data
+
+
 class WelcomePageForm(forms.ModelForm):
     class Meta:
         model = WelcomePage
@@ -0,0 +1,91 @@
+"""
+Management command to build the static assets of the site.
+
+Usage:
+    pip install -r requirements-build.txt
+    python manage.py build_assets
+    python manage.py build_assets --skip-images
+
+Builds, into the static/ directory, the files committed with the code:
+
+- static/css/tailwind.css: the Tailwind CSS classes used by the templates,
+  purged and minified, from assets/tailwind.css (Tailwind CSS v4 standalone
+  CLI, installed by the tailwindcss-bin package or available in PATH);
+- static/images/logo-<width>.webp and .png: the logo resized for the
+  navigation bar, at 1x, 2x and 3x pixel densities (Pillow).
+
+Run it after changing the classes used in the templates or the logo, then
+commit the result. In production, collectstatic adds a content hash to every
+file name and precompresses them with gzip and brotli (see STORAGES).
+"""
+import os
+import shutil
+import subprocess
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.translation import gettext as _
+
+CSS_SOURCE = os.path.join('assets', 'tailwind.css')
+CSS_OUTPUT = os.path.join('static', 'css', 'tailwind.css')
+
+LOGO_SOURCE = os.path.join('static', 'images', 'logo.png')
+# Widths of the logo variants: the navigation bar shows it 63px wide at most
+LOGO_WIDTHS = (64, 128, 192)
+# Width of the PNG variant, for the browsers without WebP support
+LOGO_FALLBACK_WIDTH = 128
+
+
+def logo_variant(width, extension):
+    return os.path.join('static', 'images', f'logo-{width}.{extension}')
+
+
+class Command(BaseCommand):
+    help = _('Construit les fichiers CSS et les images du site')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--skip-css', action='store_true', help=_('Ne construit pas le CSS'))
+        parser.add_argument('--skip-images', action='store_true', help=_('Ne construit pas les images'))
+
+    def handle(self, *args, **options):
+        if not options['skip_css']:
+            self._build_css()
+        if not options['skip_images']:
+            self._build_images()
+
+    def _build_css(self):
+        tailwindcss = shutil.which('tailwindcss')
+        if tailwindcss is None:
+            raise CommandError(
+                _('Le programme tailwindcss est introuvable. Installez requirements-build.txt.')
+            )
+        try:
+            subprocess.run(
+                [tailwindcss, '--input', CSS_SOURCE, '--output', CSS_OUTPUT, '--minify'],
+                cwd=settings.BASE_DIR, check=True, capture_output=True, text=True,
+            )
+        except subprocess.CalledProcessError as exc:
+            raise CommandError(exc.stderr)
+        self._report(CSS_OUTPUT)
+
+    def _build_images(self):
+        try:
+            from PIL import Image
+        except ImportError:
+            raise CommandError(_('La construction des images nécessite Pillow. Installez requirements-build.txt.'))
+
+        with Image.open(os.path.join(settings.BASE_DIR, LOGO_SOURCE)) as logo:
+            logo = logo.convert('RGBA')
+            for width in LOGO_WIDTHS:
+                height = round(logo.height * width / logo.width)
+                resized = logo.resize((width, height), Image.Resampling.LANCZOS)
+                outputs = [(logo_variant(width, 'webp'), {'quality': 85, 'method': 6})]
+                if width == LOGO_FALLBACK_WIDTH:
+                    outputs.append((logo_variant(width, 'png'), {'optimize': True}))
+                for path, save_options in outputs:
+                    resized.save(os.path.join(settings.BASE_DIR, path), **save_options)
+                    self._report(path)
+
+    def _report(self, path):
+        size = os.path.getsize(os.path.join(settings.BASE_DIR, path))
+        self.stdout.write(self.style.SUCCESS(f'{path} ({size / 1024:.1f} Kio)'))
@@ -0,0 +1,39 @@
+"""
+Management command to run the pending Excel export jobs.
+
+Usage:
+    python manage.py run_export_jobs
+
+Export jobs normally run in a background thread of the web process that
+requested them. This command processes the jobs left pending or interrupted
+(for instance by a server restart); it can be run by cron or a systemd timer,
+like close_expired_votes.
+"""
+from django.core.management.base import BaseCommand
+from django.utils.translation import gettext as _
+from admin_panel.export_jobs import requeue_stale_jobs, run_export_job
+from admin_panel.models import ExportJob
+
+
+class Command(BaseCommand):
+    help = _('Exécute les exports Excel en attente')
+
+    def handle(self, *args, **options):
+        """Run every pending export job, oldest first"""
+        requeued = requeue_stale_jobs()
+        if requeued:
+            self.stdout.write(_('%(count)s export(s) interrompu(s) remis en attente.') % {'count': requeued})
+
+        job_ids = list(
+            ExportJob.objects.filter(status='pending').order_by('created_at').values_list('id', flat=True)
+        )
+        for job_id in job_ids:
+            run_export_job(job_id)
+            job = ExportJob.objects.get(pk=job_id)
+            self.stdout.write(f"  - {job}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                _('%(count)s export(s) traité(s).') % {'count': len(job_ids)}
+            )
+        )
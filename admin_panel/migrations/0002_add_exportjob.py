@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0001_initial'),
+        ('voting', '0010_add_data_version_to_dategroup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cache_key', models.CharField(db_index=True, max_length=100, verbose_name='Clé de cache')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('done', 'Terminé'), ('failed', 'Échec')], default='pending', max_length=10, verbose_name='Statut')),
+                ('file_name', models.CharField(blank=True, max_length=255, verbose_name='Fichier')),
+                ('error', models.TextField(blank=True, verbose_name='Erreur')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Démarré le')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Terminé le')),
+                ('date_group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to='voting.dategroup', verbose_name='Groupe de dates')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='export_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Demandé par')),
+            ],
+            options={
+                'verbose_name': 'Export Excel',
+                'verbose_name_plural': 'Exports Excel',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:41
+
+from django.db import migrations, models
+import markdown
+
+
+def render_existing_content(apps, schema_editor):
+    """Render the Markdown of the existing welcome page"""
+    WelcomePage = apps.get_model('admin_panel', 'WelcomePage')
+    for page in WelcomePage.objects.all():
+        page.html_content = markdown.markdown(page.content, extensions=['extra', 'codehilite', 'nl2br'])
+        page.save(update_fields=['html_content'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0002_add_exportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='welcomepage',
+            name='html_content',
+            field=models.TextField(blank=True, editable=False, verbose_name='Contenu HTML'),
+        ),
+        migrations.RunPython(render_existing_content, migrations.RunPython.noop),
+    ]
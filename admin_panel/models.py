@@ -1,5 +1,14 @@
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
+import markdown
+
+WELCOME_PAGE_CACHE_KEY = 'admin_panel:welcome_page'
+
+
+def render_markdown(content):
+    """Convert the welcome page Markdown content to HTML"""
+    return markdown.markdown(content, extensions=['extra', 'codehilite', 'nl2br'])
 
 
 class WelcomePage(models.Model):
@@ -9,6 +18,7 @@ class WelcomePage(models.Model):
         help_text=_('Contenu de la page d\'accueil en format Markdown'),
         default='# Bienvenue\n\nBienvenue sur le site des Bons P\'tits Loups !'
     )
+    html_content = models.TextField(_('Contenu HTML'), blank=True, editable=False)
     updated_at = models.DateTimeField(_('Mis à jour le'), auto_now=True)
     updated_by = models.ForeignKey(
         'accounts.CustomUser',
@@ -29,10 +39,73 @@ class WelcomePage(models.Model):
     def save(self, *args, **kwargs):
         # Ensure only one instance exists
         self.pk = 1
+        # Render the Markdown once, when the content is saved
+        self.html_content = render_markdown(self.content)
         super().save(*args, **kwargs)
+        rendered = {'html_content': self.html_content, 'updated_at': self.updated_at}
+        transaction.on_commit(lambda: cache.set(WELCOME_PAGE_CACHE_KEY, rendered, None))
 
     @classmethod
     def get_instance(cls):
         """Get or create the single welcome page instance"""
         obj, created = cls.objects.get_or_create(pk=1)
         return obj
+
+    @classmethod
+    async def aget_rendered(cls):
+        """Get the rendered HTML and update time of the welcome page
+
+        Served from the cache, which save() keeps up to date; falls back to a
+        single query, or to the default content if the page was never saved.
+        """
+        rendered = await cache.aget(WELCOME_PAGE_CACHE_KEY)
+        if rendered is None:
+            rendered = await cls.objects.filter(pk=1).values('html_content', 'updated_at').afirst()
+            if rendered is None:
+                default_content = cls._meta.get_field('content').get_default()
+                rendered = {'html_content': render_markdown(default_content), 'updated_at': None}
+            await cache.aset(WELCOME_PAGE_CACHE_KEY, rendered, None)
+        return rendered
+
+
+class ExportJob(models.Model):
+    """Background Excel export of a date group, cached on disk by data version"""
+    STATUS_CHOICES = [
+        ('pending', _('En attente')),
+        ('running', _('En cours')),
+        ('done', _('Terminé')),
+        ('failed', _('Échec')),
+    ]
+
+    date_group = models.ForeignKey(
+        'voting.DateGroup',
+        on_delete=models.CASCADE,
+        related_name='export_jobs',
+        verbose_name=_('Groupe de dates')
+    )
+    cache_key = models.CharField(_('Clé de cache'), max_length=100, db_index=True)
+    status = models.CharField(_('Statut'), max_length=10, choices=STATUS_CHOICES, default='pending')
+    file_name = models.CharField(_('Fichier'), max_length=255, blank=True)
+    error = models.TextField(_('Erreur'), blank=True)
+    requested_by = models.ForeignKey(
+        'accounts.CustomUser',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='export_jobs',
+        verbose_name=_('Demandé par')
+    )
+    created_at = models.DateTimeField(_('Créé le'), auto_now_add=True)
+    started_at = models.DateTimeField(_('Démarré le'), null=True, blank=True)
+    finished_at = models.DateTimeField(_('Terminé le'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('Export Excel')
+        verbose_name_plural = _('Exports Excel')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.date_group} - {self.cache_key} ({self.status})"
+
+    def is_finished(self):
+        return self.status in ('done', 'failed')
@@ -0,0 +1,53 @@
+"""
+Prefix search on names for the parents and children lists of the admin panel.
+
+A search matches the rows whose lowercased last name, first name (or username
+for parents) starts with the typed text, reading only the matching entries of
+an index on each lowercased column, whatever the number of families:
+
+- on SQLite, the prefix is turned into a range on the ``Lower()`` expression
+  indexes (``key >= prefix AND key < prefix + U+10FFFF``), which is correct
+  with SQLite's default binary collation, unlike LIKE, which ignores these
+  indexes;
+- on PostgreSQL, where a range is not reliable under a locale collation, the
+  search is a ``LIKE 'prefix%'``, answered by the ``text_pattern_ops`` indexes
+  created by the migrations of the accounts and children apps.
+"""
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+# Upper bound of the SQLite range: sorts after any character that may follow the prefix
+PREFIX_END = '\U0010ffff'
+
+
+def search_prefix(text):
+    """Lowercase the typed text as LOWER() lowercases the indexed columns
+
+    SQLite's LOWER() only folds ASCII letters, so accented capitals must be
+    left as typed to match there.
+    """
+    text = ' '.join(text.split())
+    if connection.vendor == 'sqlite':
+        return ''.join(char.lower() if char.isascii() else char for char in text)
+    return text.lower()
+
+
+def prefix_search(queryset, text, fields):
+    """Filter a queryset on the rows having one of ``fields`` starting with ``text``
+
+    ``fields`` must each have an index on ``Lower(field)``, see the Meta of
+    CustomUser and Child, and on PostgreSQL a ``text_pattern_ops`` one. An
+    empty search returns the queryset unchanged.
+    """
+    prefix = search_prefix(text)
+    if not prefix:
+        return queryset
+    keys = {f'{field}_key': Lower(field) for field in fields}
+    condition = Q()
+    for key in keys:
+        if connection.vendor == 'postgresql':
+            condition |= Q(**{f'{key}__startswith': prefix})
+        else:
+            condition |= Q(**{f'{key}__gte': prefix, f'{key}__lt': prefix + PREFIX_END})
+    return queryset.alias(**keys).filter(condition)
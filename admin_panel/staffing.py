@@ -0,0 +1,110 @@
+"""
+Staffing planner: the children expected on each date and period, by age band,
+and the number of adults required to look after them.
+
+The supervision rates are one adult for 8 children of 5 or under and one for
+12 older children, as in the Excel export. For the date groups being planned,
+one grouped query returns the number of "yes" votes of every time slot in each
+age band, the ages being computed by the database as of the date of the slot
+(see children.ages).
+
+The rows of each group are cached under a key including its data_version, like
+the vote statistics: only the groups changed since the last display are
+queried again, all of them in the same query.
+"""
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+
+from children.ages import OVER_SIX, UNDER_SIX, age_at, age_band
+from voting.models import TimeSlot
+
+# Number of children per adult in each age band
+STAFF_RATIOS = {UNDER_SIX: 8, OVER_SIX: 12}
+
+PERIOD_ORDER = {period: index for index, (period, label) in enumerate(TimeSlot.PERIOD_CHOICES)}
+
+
+def required_staff(under_six, over_six):
+    """Number of adults required for a number of children in each age band"""
+    return math.ceil(under_six / STAFF_RATIOS[UNDER_SIX]) + math.ceil(over_six / STAFF_RATIOS[OVER_SIX])
+
+
+def staffing_cache_key(date_group):
+    return f'admin_panel:staffing:{date_group.pk}:v{date_group.data_version}'
+
+
+def _count_children(date_group_ids):
+    """Return {date_group_id: rows} for the given groups, in one query
+
+    Each row is a dict with the date, the period and the number of children
+    having voted "yes" in each age band, for every time slot of the group.
+    """
+    slots = TimeSlot.objects.filter(date_option__date_group_id__in=date_group_ids).alias(
+        vote_age_band=age_band(age_at(F('date_option__date'), 'votes__child__birth_date')),
+    ).values('date_option__date_group_id', 'date_option__date', 'period').annotate(
+        under_six=Count('votes', filter=Q(votes__choice='yes', vote_age_band=UNDER_SIX)),
+        over_six=Count('votes', filter=Q(votes__choice='yes', vote_age_band=OVER_SIX)),
+    ).order_by()
+
+    rows = {date_group_id: [] for date_group_id in date_group_ids}
+    for slot in slots:
+        rows[slot['date_option__date_group_id']].append({
+            'date': slot['date_option__date'],
+            'period': slot['period'],
+            'under_six': slot['under_six'],
+            'over_six': slot['over_six'],
+        })
+    for group_rows in rows.values():
+        group_rows.sort(key=lambda row: (row['date'], PERIOD_ORDER[row['period']]))
+    return rows
+
+
+def get_staffing_rows(date_groups):
+    """Return {date_group_id: rows} for some date groups, from the cache when possible"""
+    keys = {date_group.pk: staffing_cache_key(date_group) for date_group in date_groups}
+    cached = cache.get_many(keys.values())
+    rows = {pk: cached[key] for pk, key in keys.items() if key in cached}
+    missing = [pk for pk in keys if pk not in rows]
+    if missing:
+        computed = _count_children(missing)
+        cache.set_many({keys[pk]: computed[pk] for pk in missing}, settings.RESULTS_CACHE_TIMEOUT)
+        rows.update(computed)
+    return rows
+
+
+def build_staffing_plan(date_groups, start_date=None, end_date=None):
+    """Plan the staff of some date groups between two optional dates
+
+    Returns one row per date and period, sorted, with the date groups taking
+    place then, the total number of children in each age band and the number
+    of adults they require together.
+    """
+    titles = {date_group.pk: date_group.title for date_group in date_groups}
+    plan = defaultdict(lambda: {'date_groups': [], 'under_six': 0, 'over_six': 0})
+    for date_group_id, group_rows in get_staffing_rows(date_groups).items():
+        for row in group_rows:
+            if (start_date and row['date'] < start_date) or (end_date and row['date'] > end_date):
+                continue
+            entry = plan[(row['date'], row['period'])]
+            entry['date_groups'].append(titles[date_group_id])
+            entry['under_six'] += row['under_six']
+            entry['over_six'] += row['over_six']
+
+    period_labels = dict(TimeSlot.PERIOD_CHOICES)
+    rows = []
+    for (date, period), entry in sorted(plan.items(), key=lambda item: (item[0][0], PERIOD_ORDER[item[0][1]])):
+        rows.append({
+            'date': date,
+            'period': period,
+            'period_label': period_labels[period],
+            'date_groups': sorted(entry['date_groups']),
+            'under_six': entry['under_six'],
+            'over_six': entry['over_six'],
+            'children': entry['under_six'] + entry['over_six'],
+            'staff': required_staff(entry['under_six'], entry['over_six']),
+        })
+    return rows
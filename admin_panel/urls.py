@@ -8,15 +8,18 @@ urlpatterns = [
     path('welcome-page/', views.welcome_page, name='welcome_page'),
     path('welcome-page/edit/', views.welcome_page_edit, name='welcome_page_edit'),
     path('parents/', views.parents_list, name='parents_list'),
+    path('parents/search/', views.parents_search, name='parents_search'),
     path('parents/<int:parent_id>/reset-password/', views.reset_parent_password, name='reset_parent_password'),
     path('parents/<int:parent_id>/toggle-admin/', views.toggle_admin_status, name='toggle_admin_status'),
     path('parents/<int:parent_id>/delete/', views.delete_parent_account, name='delete_parent_account'),
     path('children/', views.children_list, name='children_list'),
+    path('staffing/', views.staffing_plan, name='staffing_plan'),
     path('create/', views.date_group_create, name='create'),
     path('<int:pk>/edit/', views.date_group_edit, name='edit'),
     path('<int:pk>/delete/', views.date_group_delete, name='delete'),
     path('<int:pk>/results/', views.results_view, name='results'),
     path('votes/<int:vote_id>/toggle/', views.toggle_vote, name='toggle_vote'),
     path('<int:pk>/export/excel/', views.export_excel, name='export_excel'),
+    path('<int:pk>/export/excel/status/', views.export_status, name='export_status'),
 ]
 
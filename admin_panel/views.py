@@ -1,16 +1,39 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404, render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.http import HttpResponse, JsonResponse
-from django.db.models import Count, Prefetch
-from django.utils.translation import gettext as _
-import markdown
+from django.http import FileResponse, JsonResponse
+from django.db import transaction
+from django.core.paginator import Paginator
+from django.db.models import Case, Prefetch, When
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.template.loader import get_template
+from django.utils.cache import patch_cache_control
+from django.utils.translation import gettext as _, get_language
+from django.views.decorators.http import condition
+from functools import lru_cache
+import hashlib
+import os
 from accounts.models import CustomUser
+from daycare_project.decorators import resolve_user
+from children.ages import OVER_SIX, UNDER_SIX
 from children.models import Child
-from voting.models import DateGroup, DateOption, TimeSlot, Vote
-from .forms import DateGroupForm, DateOptionFormSet, WelcomePageForm
+from voting.models import DateGroup, DateOption, Vote
+from voting.snapshots import delete_results_snapshot, sync_results_snapshot
+from voting.tallies import apply_tally_deltas, lock_tallies, new_deltas
+from .export_jobs import aget_current_job, export_path, get_current_job, request_export
+from .forms import DateGroupForm, DateOptionFormSet, DateRecurrenceForm, StaffingPlanForm, WelcomePageForm
 from .models import WelcomePage
+from .search import prefix_search
+from .staffing import STAFF_RATIOS, build_staffing_plan
 
+# Number of date groups shown per dashboard page
+DASHBOARD_PAGE_SIZE = 20
+# Number of families shown per page of the parents and children lists
+PARENTS_PAGE_SIZE = 25
+CHILDREN_PAGE_SIZE = 50
+# Number of suggestions returned by the parents search
+PARENT_SUGGESTIONS = 10
 
 def is_admin(user):
     """Check if user is an admin or superuser"""
@@ -20,17 +43,45 @@ def is_admin(user):
 @login_required
 @user_passes_test(is_admin)
 def dashboard(request):
-    """Admin dashboard"""
-    date_groups = DateGroup.objects.all().annotate(
-        total_votes=Count('date_options__time_slots__votes')
-    ).order_by('-created_at')
-    
+    """Admin dashboard, listing the date groups page by page, active ones first
+
+    Vote totals are read from DateGroup.total_votes, so the cost of a page does
+    not depend on the number of votes.
+    """
+    # Close the groups past their closing date on the first display after it
+    DateGroup.objects.close_expired()
+    status = request.GET.get('status', '')
+    date_groups = DateGroup.objects.all()
+    if status in dict(DateGroup.STATUS_CHOICES):
+        date_groups = date_groups.filter(status=status)
+    else:
+        status = ''
+    date_groups = date_groups.annotate(
+        status_order=Case(When(status='active', then=0), default=1)
+    ).order_by('status_order', '-created_at')
+    page = Paginator(date_groups, DASHBOARD_PAGE_SIZE).get_page(request.GET.get('page'))
+
     context = {
-        'date_groups': date_groups,
+        'date_groups': page,
+        'page': page,
+        'status': status,
+        'status_choices': DateGroup.STATUS_CHOICES,
     }
     return render(request, 'admin_panel/dashboard.html', context)
 
 
+def get_recurring_dates(recurrence_form, formset):
+    """Return the dates generated by a valid recurrence form
+
+    When there are some, the dates of the formset become optional.
+    """
+    recurring_dates = recurrence_form.get_dates() if recurrence_form.is_valid() else []
+    if recurring_dates:
+        formset.min_num = 0
+        formset.validate_min = False
+    return recurring_dates
+
+
 @login_required
 @user_passes_test(is_admin)
 def date_group_create(request):
@@ -38,22 +89,29 @@ def date_group_create(request):
     if request.method == 'POST':
         form = DateGroupForm(request.POST)
         formset = DateOptionFormSet(request.POST)
+        recurrence_form = DateRecurrenceForm(request.POST, prefix='recurrence')
+        recurring_dates = get_recurring_dates(recurrence_form, formset)
         
-        if form.is_valid() and formset.is_valid():
-            date_group = form.save(commit=False)
-            date_group.created_by = request.user
-            date_group.save()
-            formset.instance = date_group
-            formset.save()
+        if form.is_valid() and formset.is_valid() and recurrence_form.is_valid():
+            with transaction.atomic():
+                date_group = form.save(commit=False)
+                date_group.created_by = request.user
+                date_group.save()
+                formset.instance = date_group
+                formset.save()
+                # All the recurring dates, their time slots and tallies in three bulk inserts
+                DateOption.bulk_create_dates(date_group, recurring_dates)
             messages.success(request, _('Le groupe de dates "%(title)s" a été créé avec succès !') % {'title': date_group.title})
             return redirect('admin_panel:dashboard')
     else:
         form = DateGroupForm()
         formset = DateOptionFormSet()
+        recurrence_form = DateRecurrenceForm(prefix='recurrence')
     
     context = {
         'form': form,
         'formset': formset,
+        'recurrence_form': recurrence_form,
         'title': _('Créer un groupe de dates'),
     }
     return render(request, 'admin_panel/date_group_form.html', context)
@@ -68,19 +126,28 @@ def date_group_edit(request, pk):
     if request.method == 'POST':
         form = DateGroupForm(request.POST, instance=date_group)
         formset = DateOptionFormSet(request.POST, instance=date_group)
+        recurrence_form = DateRecurrenceForm(request.POST, prefix='recurrence')
+        recurring_dates = get_recurring_dates(recurrence_form, formset)
         
-        if form.is_valid() and formset.is_valid():
-            form.save()
-            formset.save()
+        if form.is_valid() and formset.is_valid() and recurrence_form.is_valid():
+            with transaction.atomic():
+                form.save()
+                formset.save()
+                DateOption.bulk_create_dates(date_group, recurring_dates)
+                DateGroup.bump_data_version(pk=date_group.pk)
+                # Freeze the results of a closed group, including its date changes
+                sync_results_snapshot(date_group)
             messages.success(request, _('Le groupe de dates "%(title)s" a été mis à jour avec succès !') % {'title': date_group.title})
             return redirect('admin_panel:dashboard')
     else:
         form = DateGroupForm(instance=date_group)
         formset = DateOptionFormSet(instance=date_group)
+        recurrence_form = DateRecurrenceForm(prefix='recurrence')
     
     context = {
         'form': form,
         'formset': formset,
+        'recurrence_form': recurrence_form,
         'title': _('Modifier un groupe de dates'),
         'date_group': date_group,
     }
@@ -107,14 +174,16 @@ def date_group_delete(request, pk):
 
 @login_required
 @user_passes_test(is_admin)
-def results_view(request, pk):
+@resolve_user
+async def results_view(request, pk):
     """View detailed voting results for a date group"""
-    date_group = get_object_or_404(DateGroup, pk=pk)
-    statistics = date_group.get_vote_statistics()
+    date_group = await aget_object_or_404(DateGroup, pk=pk)
+    statistics = await sync_to_async(date_group.get_vote_statistics)()
     
     context = {
         'date_group': date_group,
         'statistics': statistics,
+        'export_job': await aget_current_job(date_group),
     }
     return render(request, 'admin_panel/results.html', context)
 
@@ -123,16 +192,29 @@ def results_view(request, pk):
 @user_passes_test(is_admin)
 def toggle_vote(request, vote_id):
     """Toggle a child's vote between yes and no for a specific time slot"""
-    vote = get_object_or_404(Vote, pk=vote_id)
+    vote = get_object_or_404(Vote.objects.select_related('time_slot__date_option__date_group'), pk=vote_id)
     date_group = vote.time_slot.date_option.date_group
 
     if request.method == 'POST':
-        # Toggle choice
-        if vote.choice == 'yes':
-            vote.choice = 'no'
-        elif vote.choice == 'no':
-            vote.choice = 'yes'
-        vote.save()
+        with transaction.atomic():
+            # Read the vote again once its slot is locked, a concurrent save may have changed it
+            lock_tallies([vote.time_slot_id])
+            vote = get_object_or_404(Vote.objects.select_for_update(), pk=vote_id)
+            # Toggle choice
+            previous_choice = vote.choice
+            if vote.choice == 'yes':
+                vote.choice = 'no'
+            elif vote.choice == 'no':
+                vote.choice = 'yes'
+            vote.save()
+            deltas = new_deltas()
+            deltas[vote.time_slot_id][previous_choice] -= 1
+            deltas[vote.time_slot_id][vote.choice] += 1
+            apply_tally_deltas(deltas)
+            DateGroup.bump_data_version(pk=date_group.pk)
+            # The only change a closed group's results get, rebuilt on the next read
+            if date_group.status == 'closed':
+                delete_results_snapshot(date_group)
 
         # If this is an AJAX request, return JSON to avoid full page reload
         if request.headers.get('x-requested-with') == 'XMLHttpRequest':
@@ -159,210 +241,121 @@ def toggle_vote(request, vote_id):
 @login_required
 @user_passes_test(is_admin)
 def export_excel(request, pk):
-    """Export voting results to Excel - one tab per date, one line per child with yes votes"""
-    try:        
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-        from children.models import Child
-        from voting.models import Vote, TimeSlot
-        
-        thin_border = Border(left=Side(style='thin'), 
-                     right=Side(style='thin'), 
-                     top=Side(style='thin'), 
-                     bottom=Side(style='thin'))
-
-        date_group = get_object_or_404(DateGroup, pk=pk)
-        
-        wb = Workbook()
-        # Remove default sheet
-        wb.remove(wb.active)
-
-        ws = wb.create_sheet(title="Résumé")
-        ws.append([date_group.title])
-        header1 = ['', 'Matin', '', 'Repas', '', 'Après-midi', '']
-        header2 = ['Date', 'Oui', 'Non', 'Oui', 'Non', 'Oui', 'Non']
-        ws.append(header1)
-        ws.append(header2)
-        
-        # Get all date options for this group
-        date_options = date_group.date_options.all().order_by('date')
-
-        for date_option in date_options:
-            date_str = date_option.date.strftime('%d-%b-%Y')
-            ws.append([date_str,
-                       date_option.time_slots.filter(period='morning', votes__choice='yes').count(),
-                       date_option.time_slots.filter(period='morning', votes__choice='no').count(),
-                       date_option.time_slots.filter(period='lunch', votes__choice='yes').count(),
-                       date_option.time_slots.filter(period='lunch', votes__choice='no').count(),
-                       date_option.time_slots.filter(period='afternoon', votes__choice='yes').count(),
-                       date_option.time_slots.filter(period='afternoon', votes__choice='no').count()
-            ])
-        
-        ws.merge_cells(start_row=2, start_column=2, end_row=2, end_column=3)
-        ws.merge_cells(start_row=2, start_column=4, end_row=2, end_column=5)
-        ws.merge_cells(start_row=2, start_column=6, end_row=2, end_column=7)
-
-        ws.column_dimensions['A'].width = 13
-
-        for row in ws.iter_rows(min_row=2, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-            for cell in row:
-                cell.border = thin_border
-                cell.alignment = Alignment(horizontal='center')
-        
-        ws.cell(row=1, column=1).font = Font(bold=True, size=14)
-        for row in ws.iter_rows(min_row=2, max_row=3, min_col=1, max_col=ws.max_column):
-            for cell in row:
-                cell.font = Font(bold=True)
-        
-        for date_option in date_options:
-            # Create a sheet for each date
-            date_str = date_option.date.strftime('%d-%b-%Y')
-            ws = wb.create_sheet(title=date_str)
-            
-            # Headers
-            headers1 = ['', '', '', date_str, 'Réservation', '','','arrivée', '', 'départ']
-            headers2 = ['', '', '#', 'Nom', 'M', 'R', 'AM', 'heure', 'signature', 'heure', 'signature']
-            ws.append(headers1)
-            ws.append(headers2)
-
-            # Style header
-            for cell in ws[1]:
-                cell.font = Font(bold=True)
-
-            for cell in ws[2]:
-                cell.font = Font(bold=True)
-            
-            # Get all children who have at least one "yes" vote for this date
-            time_slots = date_option.time_slots.all()
-            children_with_yes = set()
-            
-            for time_slot in time_slots:
-                yes_votes = Vote.objects.filter(
-                    time_slot=time_slot,
-                    choice='yes'
-                ).select_related('child')
-                for vote in yes_votes:
-                    children_with_yes.add(vote.child)
-            
-            # Sort children by age (youngest first)
-            # Convert to list and sort by age (ascending = youngest first)
-            children_list = sorted(list(children_with_yes), key=lambda c: (c.birth_date.year, c.birth_date.month, c.birth_date.day), reverse=True)
-            
-            # Get votes for each time slot
-            morning_slot = time_slots.filter(period='morning').first()
-            lunch_slot = time_slots.filter(period='lunch').first()
-            afternoon_slot = time_slots.filter(period='afternoon').first()
-            
-            # Create vote lookup dictionaries
-            morning_votes_y = {}
-            lunch_votes_y = {}
-            afternoon_votes_y = {}
-
-            if morning_slot:
-                for vote in Vote.objects.filter(time_slot=morning_slot, choice='yes').select_related('child'):
-                    morning_votes_y[vote.child.id] = True
-            
-            if lunch_slot:
-                for vote in Vote.objects.filter(time_slot=lunch_slot, choice='yes').select_related('child'):
-                    lunch_votes_y[vote.child.id] = True
-            
-            if afternoon_slot:
-                for vote in Vote.objects.filter(time_slot=afternoon_slot, choice='yes').select_related('child'):
-                    afternoon_votes_y[vote.child.id] = True
-            
-            # Add rows for each child
-            separator = False
-            offset = 0
-            for i, child in enumerate(children_list):
-                if not separator and child.age() > 5:              
-                    separator = True
-                    offset = i
-                    ws.append(['']*len(headers1))
-                    for cell in ws[ws.max_row]:
-                        cell.fill = PatternFill(start_color='D9D9D9', end_color='D9D9D9', fill_type = "solid")
-                    if i > 0:
-                        ws.merge_cells(start_row=3, start_column=1, end_row=ws.max_row-1, end_column=1)
-
-                child_name_with_age = f"{str(child)} ({child.age()} ans)"
-                morning_vote = '✓' if child.id in morning_votes_y else ''
-                lunch_vote = '✓' if child.id in lunch_votes_y else ''
-                afternoon_vote = '✓' if child.id in afternoon_votes_y else ''
-                supervision_rate = (i+1)*1/8 if child.age() <= 5 else (i+1-offset)*1/12
-                ws.append([
-                    '-6 ans' if child.age() <= 5 else '+6 ans',
-                    f'{supervision_rate:.2f}',
-                    i+1 - offset,
-                    child_name_with_age,
-                    morning_vote,
-                    lunch_vote,
-                    afternoon_vote,
-                ])
-
-            if offset < len(children_list):
-                ws.merge_cells(start_row=offset+4, start_column=1, end_row=ws.max_row, end_column=1)
-
-            # Add a "Total" row under the last child row
-            total_row = ["Total", "", "",""]
-            total_row.append(morning_slot.votes.filter(choice='yes').count())
-            total_row.append(lunch_slot.votes.filter(choice='yes').count())
-            total_row.append(afternoon_slot.votes.filter(choice='yes').count())
-            ws.append(total_row)
-            
-            # Auto-adjust column widths
-            for column in ws.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if cell.value and len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                ws.column_dimensions[column_letter].width = adjusted_width
-            
-            ws.column_dimensions['E'].width = 3.5
-            ws.column_dimensions['F'].width = 3.5
-            ws.column_dimensions['G'].width = 3.5
-            ws.column_dimensions['H'].width = 10
-            ws.column_dimensions['I'].width = 27
-            ws.column_dimensions['J'].width = 10
-            ws.column_dimensions['K'].width = 27
-            
-            ws.merge_cells(start_row=1, start_column=5, end_row=1, end_column=7)
-            ws.merge_cells(start_row=1, start_column=8, end_row=1, end_column=9)
-            ws.merge_cells(start_row=1, start_column=10, end_row=1, end_column=11)
-
-            for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=ws.max_column):
-                for cell in row:
-                    cell.border = thin_border
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-        
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = f'attachment; filename="{date_group.title}_results.xlsx"'
-        wb.save(response)
-        return response
+    """Export voting results to Excel - one tab per date, one line per child with yes votes
+
+    The workbook is built by a background job and cached on disk until the
+    group's data changes. A POST (the export button of the results page)
+    serves an up-to-date export directly, otherwise starts a job whose progress
+    is shown on the results page. A GET only downloads an up-to-date export, so
+    that prefetchers and crawlers never start one.
+    """
+    try:
+        import openpyxl  # noqa: F401
     except ImportError:
         messages.error(request, _('L\'export Excel nécessite openpyxl. Veuillez l\'installer.'))
         return redirect('admin_panel:results', pk=pk)
 
+    date_group = get_object_or_404(DateGroup, pk=pk)
+    if request.method == 'POST':
+        job = request_export(date_group, request.user)
+    else:
+        job = get_current_job(date_group)
+
+    if job is not None and job.status == 'done' and os.path.exists(export_path(job.file_name)):
+        return FileResponse(
+            open(export_path(job.file_name), 'rb'),
+            as_attachment=True,
+            filename=f'{date_group.title}_results.xlsx',
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        )
+
+    if request.method == 'POST':
+        messages.info(request, _('L\'export Excel est en cours de préparation. Il sera téléchargeable dans quelques instants.'))
+    return redirect('admin_panel:results', pk=pk)
+
+
+@login_required
+@user_passes_test(is_admin)
+def staffing_plan(request):
+    """Children expected and staff required on each date and period of some date groups
+
+    Covers the selected date groups (the active ones by default), between the
+    optional start and end dates, such as a school term.
+    """
+    form = StaffingPlanForm(request.GET or None)
+    date_groups = []
+    start_date = end_date = None
+    if not form.is_bound:
+        date_groups = list(DateGroup.objects.filter(status='active'))
+    elif form.is_valid():
+        date_groups = list(form.cleaned_data['date_groups']) or list(DateGroup.objects.filter(status='active'))
+        start_date = form.cleaned_data['start_date']
+        end_date = form.cleaned_data['end_date']
+    rows = build_staffing_plan(date_groups, start_date, end_date)
+
+    context = {
+        'form': form,
+        'rows': rows,
+        'date_groups': date_groups,
+        'max_staff': max((row['staff'] for row in rows), default=0),
+        'under_six_ratio': STAFF_RATIOS[UNDER_SIX],
+        'over_six_ratio': STAFF_RATIOS[OVER_SIX],
+    }
+    return render(request, 'admin_panel/staffing_plan.html', context)
+
+
+@login_required
+@user_passes_test(is_admin)
+def export_status(request, pk):
+    """Return the status of the Excel export of a date group as JSON"""
+    date_group = get_object_or_404(DateGroup, pk=pk)
+    job = get_current_job(date_group)
+
+    return JsonResponse(
+        {
+            'status': job.status if job else None,
+            'error': job.error if job else '',
+        }
+    )
+
 
 @login_required
 @user_passes_test(is_admin)
 def parents_list(request):
-    """List all registered parents with their email and children"""
-    parents = CustomUser.objects.prefetch_related(
-        Prefetch('children', queryset=Child.objects.order_by('last_name', 'first_name'))
-    ).filter(is_parent=True).order_by('last_name', 'first_name')
-    
+    """List the registered parents with their children, page by page
+
+    ``q`` filters the parents whose last name, first name or username starts
+    with it. Only the children of the displayed page are loaded.
+    """
+    q = request.GET.get('q', '').strip()
+    parents = prefix_search(CustomUser.objects.filter(is_parent=True), q, ['last_name', 'first_name', 'username'])
+    parents = parents.prefetch_related(
+        Prefetch('children', queryset=Child.objects.with_age().order_by('last_name', 'first_name'))
+    ).order_by('last_name', 'first_name', 'pk')
+    page = Paginator(parents, PARENTS_PAGE_SIZE).get_page(request.GET.get('page'))
+
     context = {
-        'parents': parents,
+        'parents': page,
+        'page': page,
+        'q': q,
     }
     return render(request, 'admin_panel/parents_list.html', context)
 
 
+@login_required
+@user_passes_test(is_admin)
+def parents_search(request):
+    """Return the first parents matching the ``q`` prefix as JSON, for the search field"""
+    q = request.GET.get('q', '').strip()
+    parents = []
+    if q:
+        parents = prefix_search(
+            CustomUser.objects.filter(is_parent=True), q, ['last_name', 'first_name', 'username']
+        ).order_by('last_name', 'first_name', 'pk').values('id', 'username', 'first_name', 'last_name')[:PARENT_SUGGESTIONS]
+
+    return JsonResponse({'results': list(parents)})
+
+
 @login_required
 @user_passes_test(is_admin)
 def reset_parent_password(request, parent_id):
@@ -433,30 +426,66 @@ def delete_parent_account(request, parent_id):
 @login_required
 @user_passes_test(is_admin)
 def children_list(request):
-    """List all children sorted by age (ascending - youngest first)"""
+    """List the children page by page, youngest first
+
+    ``q`` filters the children whose last name or first name starts with it.
+    """
+    q = request.GET.get('q', '').strip()
+    children = prefix_search(Child.objects.all(), q, ['last_name', 'first_name'])
     # Sort by birth_date descending (most recent = youngest = first)
-    children = Child.objects.select_related('parent').order_by('-birth_date')
-    
+    children = children.with_age().select_related('parent').order_by('-birth_date', 'pk')
+    page = Paginator(children, CHILDREN_PAGE_SIZE).get_page(request.GET.get('page'))
+
     context = {
-        'children': children,
+        'children': page,
+        'page': page,
+        'q': q,
     }
     return render(request, 'admin_panel/children_list.html', context)
 
 
-def welcome_page(request):
+@lru_cache(maxsize=None)
+def _welcome_templates_digest():
+    """Digest of the templates of the welcome page, so a deploy changes its ETag"""
+    digest = hashlib.md5()
+    for template_name in ('base.html', 'admin_panel/welcome_page.html'):
+        digest.update(get_template(template_name).template.source.encode())
+    return digest.hexdigest()
+
+
+def welcome_page_etag(request, rendered):
+    """ETag of the welcome page for anonymous visitors
+
+    Pages of authenticated users have a personalised navigation bar and pending
+    flash messages are only shown once, so neither gets an ETag.
+    """
+    if request.user.is_authenticated or CookieStorage.cookie_name in request.COOKIES:
+        return None
+    key = f"{rendered['updated_at']}|{get_language()}|{_welcome_templates_digest()}"
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+@condition(etag_func=welcome_page_etag)
+async def _render_welcome_page(request, rendered):
+    response = render(request, 'admin_panel/welcome_page.html', {'html_content': rendered['html_content']})
+    if not request.user.is_authenticated:
+        # Let browsers revalidate with the ETag and get a 304 when nothing changed
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+async def render_welcome_page(request):
+    """Render the welcome page from its stored HTML, without parsing Markdown
+
+    request.user must already be loaded (see daycare_project.decorators).
+    """
+    return await _render_welcome_page(request, await WelcomePage.aget_rendered())
+
+
+@resolve_user
+async def welcome_page(request):
     """Display the welcome page with Markdown content"""
-    welcome_page_obj = WelcomePage.get_instance()
-    # Convert Markdown to HTML
-    html_content = markdown.markdown(
-        welcome_page_obj.content,
-        extensions=['extra', 'codehilite', 'nl2br']
-    )
-    
-    context = {
-        'welcome_page': welcome_page_obj,
-        'html_content': html_content,
-    }
-    return render(request, 'admin_panel/welcome_page.html', context)
+    return await render_welcome_page(request)
 
 
 @login_required
@@ -476,15 +505,10 @@ def welcome_page_edit(request):
     else:
         form = WelcomePageForm(instance=welcome_page_obj)
     
-    # Preview the Markdown content
-    html_content = markdown.markdown(
-        welcome_page_obj.content,
-        extensions=['extra', 'codehilite', 'nl2br']
-    )
-    
     context = {
         'form': form,
         'welcome_page': welcome_page_obj,
-        'html_content': html_content,
+        # Preview the Markdown content, rendered when the page was saved
+        'html_content': welcome_page_obj.html_content,
     }
     return render(request, 'admin_panel/welcome_page_edit.html', context)
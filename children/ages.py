@@ -0,0 +1,60 @@
+"""
+Ages of the children computed by the database.
+
+The age of a child matters on the day they are looked after, so it is computed
+as of a reference date: the date of a DateOption for the plannings and the
+exports, today for the lists. age_at() and age_band() build query expressions,
+so that a queryset can annotate, sort and partition its rows by age without
+any date arithmetic in Python:
+
+    Vote.objects.annotate(
+        child_age=age_at(F('time_slot__date_option__date'), 'child__birth_date'),
+    ).annotate(child_age_band=age_band('child_age'))
+"""
+import datetime
+
+from django.db.models import Case, DateField, F, IntegerField, Value, When
+from django.db.models.functions import ExtractDay, ExtractMonth, ExtractYear
+from django.db.models.lookups import LessThan, LessThanOrEqual
+
+# Age bands of the supervision rates, in their display order
+UNDER_SIX = 0
+OVER_SIX = 1
+AGE_BAND_LABELS = {UNDER_SIX: '-6 ans', OVER_SIX: '+6 ans'}
+# Oldest age of the "-6 ans" band
+UNDER_SIX_MAX_AGE = 5
+
+
+def _as_expression(value):
+    if isinstance(value, str):
+        return F(value)
+    if isinstance(value, datetime.date):
+        return Value(value, output_field=DateField())
+    return value
+
+
+def _month_day(date):
+    return ExtractMonth(date) * 100 + ExtractDay(date)
+
+
+def age_at(reference, birth_date='birth_date'):
+    """Expression of the age in full years on ``reference`` of a person born on ``birth_date``
+
+    ``reference`` and ``birth_date`` are field names, expressions or dates.
+    """
+    reference = _as_expression(reference)
+    birth_date = _as_expression(birth_date)
+    return ExtractYear(reference) - ExtractYear(birth_date) - Case(
+        When(LessThan(_month_day(reference), _month_day(birth_date)), then=Value(1)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def age_band(age):
+    """Expression of the age band (UNDER_SIX or OVER_SIX) of an age expression or field"""
+    return Case(
+        When(LessThanOrEqual(_as_expression(age), UNDER_SIX_MAX_AGE), then=Value(UNDER_SIX)),
+        default=Value(OVER_SIX),
+        output_field=IntegerField(),
+    )
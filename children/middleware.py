@@ -0,0 +1,78 @@
+"""
+Request-scoped access to the children of the current parent.
+
+ParentChildrenMiddleware gives every request:
+
+- ``request.children``: the children of the logged-in user, loaded lazily on
+  first use and then kept for the rest of the request (an empty list for
+  anonymous users);
+- ``await request.achildren()``: the same list, for the async views.
+
+The list is also cached per user for settings.CHILDREN_CACHE_TIMEOUT seconds,
+so most page views read it without any query. Creating, editing or deleting a
+child deletes the cache entry of its parent, and of its previous parent when it
+is moved (see children.signals).
+
+The list is meant for display: views that write on behalf of a child check
+that the child belongs to the user with a query instead.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+from .models import Child
+
+
+def children_cache_key(parent_id):
+    return f'children:parent:{parent_id}'
+
+
+def invalidate_parent_children(parent_id):
+    cache.delete(children_cache_key(parent_id))
+
+
+def get_parent_children(user):
+    """Return the children of a user as a list, from the cache when possible"""
+    if not user.is_authenticated:
+        return []
+    key = children_cache_key(user.pk)
+    children = cache.get(key)
+    if children is None:
+        children = list(Child.objects.filter(parent=user))
+        cache.set(key, children, settings.CHILDREN_CACHE_TIMEOUT)
+    return children
+
+
+async def aget_parent_children(user):
+    """Async version of get_parent_children()"""
+    if not user.is_authenticated:
+        return []
+    key = children_cache_key(user.pk)
+    children = await cache.aget(key)
+    if children is None:
+        children = [child async for child in Child.objects.filter(parent=user)]
+        await cache.aset(key, children, settings.CHILDREN_CACHE_TIMEOUT)
+    return children
+
+
+def get_children(request):
+    if not hasattr(request, '_cached_children'):
+        request._cached_children = get_parent_children(request.user)
+    return request._cached_children
+
+
+async def aget_children(request):
+    if not hasattr(request, '_cached_children'):
+        request._cached_children = await aget_parent_children(await request.auser())
+    return request._cached_children
+
+
+class ParentChildrenMiddleware(MiddlewareMixin):
+    """Set request.children and request.achildren(), after AuthenticationMiddleware"""
+
+    def process_request(self, request):
+        request.children = SimpleLazyObject(lambda: get_children(request))
+        request.achildren = partial(aget_children, request)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('children', '0003_replace_name_with_first_last_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='child',
+            index=models.Index(fields=['parent', 'last_name', 'first_name'], name='child_parent_name_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:09
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+# Prefix search on PostgreSQL, see admin_panel.search
+PATTERN_INDEXES = [
+    ('child_last_name_like_idx', 'last_name'),
+    ('child_first_name_like_idx', 'first_name'),
+]
+
+
+def create_pattern_indexes(apps, schema_editor):
+    """Index the lowercased names for LIKE 'prefix%' searches, on PostgreSQL only"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('children', 'Child')._meta.db_table
+    for name, column in PATTERN_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX {schema_editor.quote_name(name)} ON {schema_editor.quote_name(table)} '
+            f'(LOWER({schema_editor.quote_name(column)}) text_pattern_ops)'
+        )
+
+
+def drop_pattern_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, column in PATTERN_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('children', '0004_add_composite_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='child',
+            index=models.Index(fields=['-birth_date'], name='child_birth_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='child',
+            index=models.Index(django.db.models.functions.text.Lower('last_name'), name='child_last_name_key_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='child',
+            index=models.Index(django.db.models.functions.text.Lower('first_name'), name='child_first_name_key_idx'),
+        ),
+        migrations.RunPython(create_pattern_indexes, drop_pattern_indexes),
+    ]
@@ -1,7 +1,17 @@
 from django.db import models
 from django.conf import settings
+from django.db.models.functions import Lower
 from django.utils.translation import gettext_lazy as _
 from datetime import date
+from .ages import age_at, age_band
+
+
+class ChildQuerySet(models.QuerySet):
+    def with_age(self, reference_date=None):
+        """Annotate age_at_date and age_band, the age on reference_date (today by default)"""
+        return self.annotate(age_at_date=age_at(reference_date or date.today())).annotate(
+            age_band=age_band('age_at_date')
+        )
 
 
 class Child(models.Model):
@@ -10,15 +20,25 @@ class Child(models.Model):
     birth_date = models.DateField(verbose_name=_('Date de naissance'))
     parent = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='children', verbose_name=_('Parent'))
 
+    objects = ChildQuerySet.as_manager()
+
     class Meta:
         verbose_name = _('Enfant')
         verbose_name_plural = _('Enfants')
         ordering = ['last_name', 'first_name']
+        indexes = [
+            models.Index(fields=['parent', 'last_name', 'first_name'], name='child_parent_name_idx'),
+            # Children list of the admin panel, youngest first, and its prefix
+            # search, see admin_panel.search
+            models.Index(fields=['-birth_date'], name='child_birth_date_idx'),
+            models.Index(Lower('last_name'), name='child_last_name_key_idx'),
+            models.Index(Lower('first_name'), name='child_first_name_key_idx'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
     def age(self):
-        """Calculate age in years"""
+        """Calculate age in years, see ChildQuerySet.with_age() for lists"""
         today = date.today()
         return today.year - self.birth_date.year - ((today.month, today.day) < (self.birth_date.month, self.birth_date.day))
@@ -0,0 +1,34 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from .middleware import invalidate_parent_children
+from .models import Child
+
+
+@receiver(pre_save, sender=Child)
+def remember_previous_parent(sender, instance, raw=False, **kwargs):
+    """Record the stored parent of a child, which may be about to change"""
+    if raw or instance.pk is None:
+        instance._previous_parent_id = None
+        return
+    instance._previous_parent_id = Child.objects.filter(pk=instance.pk).values_list(
+        'parent_id', flat=True
+    ).first()
+
+
+@receiver(post_save, sender=Child)
+@receiver(post_delete, sender=Child)
+def invalidate_cached_children(sender, instance, **kwargs):
+    """The cached children lists of the parent, and of the previous one, are out of date
+
+    A child moved to another parent (from the Django admin) must leave the list
+    of its previous parent as well. Deleted once committed, so that a concurrent
+    request cannot cache the lists again from the data before the change.
+    """
+    parent_ids = {instance.parent_id, getattr(instance, '_previous_parent_id', None)} - {None}
+
+    def invalidate():
+        for parent_id in parent_ids:
+            invalidate_parent_children(parent_id)
+
+    transaction.on_commit(invalidate)
@@ -9,8 +9,7 @@ from .forms import ChildForm
 @login_required
 def dashboard(request):
     """Parent dashboard showing all their children"""
-    children = Child.objects.filter(parent=request.user)
-    return render(request, 'children/dashboard.html', {'children': children})
+    return render(request, 'children/dashboard.html', {'children': request.children})
 
 
 @login_required
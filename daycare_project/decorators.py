@@ -0,0 +1,25 @@
+"""
+Helpers for the async views.
+
+The read-heavy pages (home, date group list, results) are async views served
+without holding a worker thread while they wait on the database under ASGI
+(see the README). They query with Django's async ORM (``aget()``, ``async for``)
+and call the synchronous engines, such as the statistics, through
+``sync_to_async``.
+"""
+from functools import wraps
+
+
+def resolve_user(view_func):
+    """Load request.user with the async ORM before an async view runs
+
+    request.user is otherwise loaded on first access with a synchronous query,
+    which Django refuses to run in async code, e.g. when the auth context
+    processor or a template reads it. Under login_required or user_passes_test
+    the user is already fetched and this costs no query.
+    """
+    @wraps(view_func)
+    async def wrapper(request, *args, **kwargs):
+        request.user = await request.auser()
+        return await view_func(request, *args, **kwargs)
+    return wrapper
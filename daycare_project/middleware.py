@@ -0,0 +1,145 @@
+"""
+Per-request SQL and timing instrumentation.
+
+RequestInstrumentationMiddleware records, for each request, the number of SQL
+queries, the time spent in the database, the slowest statements, the template
+rendering time and the total time. They are sent in a ``Server-Timing`` header,
+shown by the network panel of browsers, and logged as one JSON line keyed by the
+resolved URL name (``voting:vote``, ``admin_panel:export_excel``...). Requests
+over settings.QUERY_BUDGET queries are logged as warnings.
+
+The middleware is opt-in: it removes itself unless settings.REQUEST_INSTRUMENTATION
+is true, so it costs nothing when disabled.
+"""
+import heapq
+import json
+import logging
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.backends.django import Template
+
+logger = logging.getLogger(__name__)
+
+# Statistics of the request being processed, if instrumented
+_current_stats = ContextVar('request_instrumentation_stats', default=None)
+
+# Longest SQL statement kept in the log
+MAX_SQL_LENGTH = 300
+
+
+class RequestStats:
+    """SQL and template rendering statistics of a request"""
+
+    def __init__(self, slow_queries_count):
+        self.slow_queries_count = slow_queries_count
+        self.queries = 0
+        self.sql_time = 0.0
+        self.slowest = []
+        self.template_time = 0.0
+        self.render_depth = 0
+
+    def record_query(self, sql, duration):
+        self.queries += 1
+        self.sql_time += duration
+        entry = (duration, self.queries, sql)
+        if len(self.slowest) < self.slow_queries_count:
+            heapq.heappush(self.slowest, entry)
+        elif self.slowest and duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def slowest_queries(self):
+        return [
+            {'ms': round(duration * 1000, 2), 'sql': sql[:MAX_SQL_LENGTH]}
+            for duration, _order, sql in sorted(self.slowest, reverse=True)
+        ]
+
+
+def _record_query(execute, sql, params, many, context):
+    """Database execute wrapper timing the queries of the current request"""
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.record_query(sql, time.perf_counter() - start)
+
+
+def _instrument_template_rendering():
+    """Time the rendering of the templates of instrumented requests
+
+    Only the outermost render is timed, as templates rendered from template tags
+    (crispy forms...) are part of it.
+    """
+    if getattr(Template.render, 'instrumented', False):
+        return
+    render = Template.render
+
+    def timed_render(self, context=None, request=None):
+        stats = _current_stats.get()
+        if stats is None:
+            return render(self, context, request)
+        stats.render_depth += 1
+        start = time.perf_counter()
+        try:
+            return render(self, context, request)
+        finally:
+            stats.render_depth -= 1
+            if not stats.render_depth:
+                stats.template_time += time.perf_counter() - start
+
+    timed_render.instrumented = True
+    Template.render = timed_render
+
+
+class RequestInstrumentationMiddleware:
+    """Log the SQL and timing statistics of each request and send them as Server-Timing"""
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_INSTRUMENTATION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.query_budget = getattr(settings, 'QUERY_BUDGET', None)
+        self.slow_queries_count = getattr(settings, 'SLOW_QUERIES_COUNT', 3)
+        _instrument_template_rendering()
+
+    def __call__(self, request):
+        stats = RequestStats(self.slow_queries_count)
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_record_query))
+                response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        total_time = time.perf_counter() - start
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.queries} queries"',
+            f'tpl;dur={stats.template_time * 1000:.1f};desc="Templates"',
+            f'total;dur={total_time * 1000:.1f};desc="Total"',
+        ])
+
+        over_budget = self.query_budget is not None and stats.queries > self.query_budget
+        match = request.resolver_match
+        logger.log(logging.WARNING if over_budget else logging.INFO, json.dumps({
+            'url_name': match.view_name if match else None,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': stats.queries,
+            'sql_ms': round(stats.sql_time * 1000, 2),
+            'template_ms': round(stats.template_time * 1000, 2),
+            'total_ms': round(total_time * 1000, 2),
+            'over_budget': over_budget,
+            'slowest_queries': stats.slowest_queries(),
+        }))
+        return response
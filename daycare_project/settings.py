@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -45,13 +46,21 @@ INSTALLED_APPS = [
     'admin_panel',
 ]
 
+# Static files are served by WhiteNoise, unless DJANGO_SERVE_STATIC=0 when the
+# reverse proxy serves STATIC_ROOT (recommended under ASGI, as WhiteNoise is a
+# synchronous middleware)
+SERVE_STATIC = os.environ.get('DJANGO_SERVE_STATIC', '1') == '1'
+
 MIDDLEWARE = [
+    'daycare_project.middleware.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    *(['whitenoise.middleware.WhiteNoiseMiddleware'] if SERVE_STATIC else []),
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'children.middleware.ParentChildrenMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -78,13 +87,49 @@ WSGI_APPLICATION = 'daycare_project.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite is tuned for concurrent use: in WAL mode reads are not blocked by a
+# write, writers wait for the lock (busy_timeout) instead of failing with
+# "database is locked", and transactions take the write lock when they start so
+# that two of them cannot deadlock while upgrading their locks.
+# Set DJANGO_DB_ENGINE=postgresql and the POSTGRES_* variables to use
+# PostgreSQL instead (requires `pip install "psycopg[binary]"`).
+# Connections are kept open between requests, and checked before reuse.
+# Compare the configurations with `python manage.py benchmark_concurrency`.
+
+DATABASE_CONN_MAX_AGE = int(os.environ.get('DJANGO_CONN_MAX_AGE', 60))
+
+if os.environ.get('DJANGO_DB_ENGINE') == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'bonptitloup'),
+            'USER': os.environ.get('POSTGRES_USER', 'bonptitloup'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA busy_timeout=5000;'
+                    'PRAGMA cache_size=-20000;'
+                    'PRAGMA temp_store=MEMORY;'
+                ),
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
     }
-}
 
 
 # Password validation
@@ -92,6 +137,20 @@ DATABASES = {
 
 AUTH_PASSWORD_VALIDATORS = []
 
+# Sessions and the logged-in user are read from the cache, so authenticated
+# page views usually run no query before the view. cached_db sessions are
+# also written to the database, so they survive a cache clear; the signed
+# cookie backend (django.contrib.sessions.backends.signed_cookies) needs no
+# storage at all, but its sessions cannot be revoked server-side.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+AUTHENTICATION_BACKENDS = [
+    'accounts.backends.CachedModelBackend',
+    # Keeps valid the sessions opened before the cached backend, until their
+    # users log in again
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -128,10 +187,74 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic adds a content hash to the file names, so they can be cached
+# forever, and writes gzip and brotli versions of them. The CSS and the logo
+# variants are built beforehand by `python manage.py build_assets`.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 # Media files
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Cached Excel exports (see admin_panel.export_jobs), kept out of MEDIA_ROOT
+# since they contain children's names and must only be served to admins
+EXPORTS_ROOT = BASE_DIR / 'exports'
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# A file-based cache is shared by all the worker processes of a host. Cached
+# results are keyed by DateGroup.data_version, so they never need explicit
+# invalidation; the cached children of each parent are deleted on every change
+# (see children.middleware). A DatabaseCache (after `manage.py createcachetable`)
+# works too.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    }
+}
+
+# How long computed vote statistics and results fragments are kept (seconds)
+RESULTS_CACHE_TIMEOUT = 60 * 60
+
+# How long the children of a parent are cached between two changes (seconds)
+CHILDREN_CACHE_TIMEOUT = 5 * 60
+
+# How long a logged-in user is cached between two changes (seconds)
+USER_CACHE_TIMEOUT = 15 * 60
+
+# Request instrumentation (see daycare_project.middleware)
+# When enabled, every response gets a Server-Timing header and a JSON log line
+# with its SQL and timing statistics; requests running more than QUERY_BUDGET
+# queries are logged as warnings.
+REQUEST_INSTRUMENTATION = False
+QUERY_BUDGET = 30
+SLOW_QUERIES_COUNT = 3
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'daycare_project.middleware': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
 # Crispy Forms
 CRISPY_ALLOWED_TEMPLATE_PACKS = 'bootstrap5'
 CRISPY_TEMPLATE_PACK = 'bootstrap5'
@@ -1,5 +1,8 @@
 from django.contrib import admin
+from django.db import transaction
 from .models import DateGroup, DateOption, TimeSlot, Vote
+from .snapshots import sync_results_snapshot
+from .tallies import apply_tally_deltas, new_deltas, remove_votes_from_tallies
 
 
 class DateOptionInline(admin.TabularInline):
@@ -19,6 +22,11 @@ class DateGroupAdmin(admin.ModelAdmin):
         return obj.get_total_votes()
     get_total_votes.short_description = 'Total Votes'
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        DateGroup.bump_data_version(pk=form.instance.pk)
+        sync_results_snapshot(form.instance)
+
 
 class TimeSlotInline(admin.TabularInline):
     model = TimeSlot
@@ -34,15 +42,31 @@ class DateOptionAdmin(admin.ModelAdmin):
     search_fields = ('date_group__title',)
     inlines = [TimeSlotInline]
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        DateGroup.bump_data_version(pk=obj.date_group_id)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        DateGroup.bump_data_version(pk=obj.date_group_id)
+
+    def delete_queryset(self, request, queryset):
+        group_ids = list(queryset.values_list('date_group_id', flat=True))
+        super().delete_queryset(request, queryset)
+        DateGroup.bump_data_version(pk__in=group_ids)
+
 
 @admin.register(TimeSlot)
 class TimeSlotAdmin(admin.ModelAdmin):
     list_display = ('date_option', 'period', 'get_vote_count')
     list_filter = ('period', 'date_option__date_group')
     search_fields = ('date_option__date_group__title',)
-    
+    list_select_related = ('date_option', 'tally')
+
     def get_vote_count(self, obj):
-        return obj.votes.count()
+        if not hasattr(obj, 'tally'):
+            return 0
+        return obj.tally.total
     get_vote_count.short_description = 'Nombre de votes'
 
 
@@ -55,3 +79,26 @@ class VoteAdmin(admin.ModelAdmin):
     def child__parent(self, obj):
         return obj.child.parent.username
     child__parent.short_description = 'Parent'
+
+    def save_model(self, request, obj, form, change):
+        with transaction.atomic():
+            deltas = new_deltas()
+            if change:
+                previous = Vote.objects.get(pk=obj.pk)
+                deltas[previous.time_slot_id][previous.choice] -= 1
+            super().save_model(request, obj, form, change)
+            deltas[obj.time_slot_id][obj.choice] += 1
+            apply_tally_deltas(deltas)
+            DateGroup.bump_data_version(date_options__time_slots__in=list(deltas))
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            remove_votes_from_tallies(Vote.objects.filter(pk=obj.pk))
+            DateGroup.bump_data_version(date_options__time_slots__votes=obj)
+            super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        with transaction.atomic():
+            remove_votes_from_tallies(queryset)
+            DateGroup.bump_data_version(date_options__time_slots__votes__in=queryset)
+            super().delete_queryset(request, queryset)
@@ -0,0 +1,196 @@
+"""
+Management command to compare the WSGI and ASGI throughput of the read pages.
+
+Usage:
+    python manage.py seed_data --parents 200
+    python manage.py benchmark_asgi
+    python manage.py benchmark_asgi --concurrency 100 --requests 2000 --threads 8
+
+Simulates --concurrency parents refreshing the results page, the date group
+list and the home page as fast as they can, through the real WSGI and ASGI
+applications of the project (daycare_project.wsgi and daycare_project.asgi),
+called in process without a network server:
+
+- WSGI: requests wait for one of --threads worker threads, like a threaded
+  WSGI server (gunicorn --threads, mod_wsgi...);
+- ASGI: every request runs on the event loop, as under uvicorn or daphne, the
+  async views only using a thread while they run a query.
+
+Both modes serve the same number of requests with the same concurrency, and
+the command reports their throughput, latency (including the wait for a
+worker) and the number of threads used. It only reads the database.
+"""
+import asyncio
+import io
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils.translation import gettext as _
+from children.models import Child
+from voting.models import DateGroup
+
+HOST = 'testserver'
+
+
+class Command(BaseCommand):
+    help = _('Compare le débit WSGI et ASGI des pages de consultation')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=50, help=_('Nombre de requêtes simultanées'))
+        parser.add_argument('--requests', type=int, default=1000, help=_('Nombre de requêtes par mode'))
+        parser.add_argument('--threads', type=int, default=8, help=_('Nombre de threads du serveur WSGI'))
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['requests'] < 1 or options['threads'] < 1:
+            raise CommandError(_('Les nombres de requêtes et de threads doivent être positifs.'))
+
+        date_group = DateGroup.objects.open_for_voting().order_by('-total_votes').first()
+        if date_group is None:
+            raise CommandError(_('Aucun groupe de dates ouvert au vote trouvé, lancez d\'abord seed_data.'))
+        child = Child.objects.filter(votes__time_slot__date_option__date_group=date_group).first()
+        if child is None:
+            raise CommandError(_('Aucun vote dans ce groupe de dates, lancez d\'abord seed_data.'))
+
+        paths = [
+            reverse('voting:results', args=[date_group.pk]),
+            reverse('voting:list'),
+            reverse('home'),
+        ]
+        self.stdout.write(
+            _('Groupe « %(title)s » (%(pk)s), %(concurrency)s requêtes simultanées, pages : %(paths)s') % {
+                'title': date_group.title, 'pk': date_group.pk,
+                'concurrency': options['concurrency'], 'paths': ', '.join(paths),
+            }
+        )
+
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, HOST]):
+            client = Client()
+            client.force_login(child.parent)
+            cookie = '; '.join(f'{name}={morsel.value}' for name, morsel in client.cookies.items())
+
+            for mode, run in (('WSGI', self._run_wsgi), ('ASGI', self._run_asgi)):
+                result = asyncio.run(run(paths, cookie, options))
+                timings = sorted(result['timings'])
+                self.stdout.write(
+                    f"  {mode}  {len(timings) / result['elapsed']:8.1f} req/s"
+                    f"  p50 {statistics.median(timings):8.2f} ms"
+                    f"  p95 {timings[int(len(timings) * 0.95)]:8.2f} ms"
+                    f"  max {timings[-1]:8.2f} ms"
+                    f"  {result['threads']:>3} threads"
+                )
+                if result['errors']:
+                    raise CommandError(_('%(mode)s : réponses en erreur %(errors)s') % {
+                        'mode': mode, 'errors': sorted(result['errors']),
+                    })
+
+    async def _drive(self, request, paths, options):
+        """Send the requests from --concurrency clients, return their timings"""
+        result = {'timings': [], 'errors': set(), 'threads': 0}
+        remaining = iter(range(options['requests']))
+
+        async def client():
+            for i in remaining:
+                path = paths[i % len(paths)]
+                start = time.perf_counter()
+                status = await request(path)
+                result['timings'].append((time.perf_counter() - start) * 1000)
+                result['threads'] = max(result['threads'], threading.active_count())
+                if status != 200:
+                    result['errors'].add((path, status))
+
+        # Warm up the caches and the connections of the mode
+        for path in paths:
+            await request(path)
+        start = time.perf_counter()
+        await asyncio.gather(*(client() for _i in range(options['concurrency'])))
+        result['elapsed'] = time.perf_counter() - start
+        return result
+
+    async def _run_wsgi(self, paths, cookie, options):
+        application = get_wsgi_application()
+        executor = ThreadPoolExecutor(max_workers=options['threads'])
+        loop = asyncio.get_running_loop()
+
+        def call(path):
+            status = []
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'SCRIPT_NAME': '',
+                'PATH_INFO': path,
+                'QUERY_STRING': '',
+                'SERVER_NAME': HOST,
+                'SERVER_PORT': '80',
+                'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': HOST,
+                'HTTP_COOKIE': cookie,
+                'wsgi.input': io.BytesIO(),
+                'wsgi.errors': sys.stderr,
+                'wsgi.url_scheme': 'http',
+                'wsgi.multithread': True,
+                'wsgi.multiprocess': False,
+                'wsgi.run_once': False,
+            }
+            response = application(environ, lambda code, headers, exc_info=None: status.append(code))
+            try:
+                b''.join(response)
+            finally:
+                response.close()
+            return int(status[0].split()[0])
+
+        async def request(path):
+            return await loop.run_in_executor(executor, call, path)
+
+        try:
+            return await self._drive(request, paths, options)
+        finally:
+            executor.shutdown()
+
+    async def _run_asgi(self, paths, cookie, options):
+        application = get_asgi_application()
+
+        async def request(path):
+            status = []
+            disconnected = asyncio.Event()
+            body_sent = False
+
+            async def receive():
+                nonlocal body_sent
+                if not body_sent:
+                    body_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                # Django listens for a disconnect while the view runs
+                await disconnected.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            await application({
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': path,
+                'raw_path': path.encode(),
+                'root_path': '',
+                'query_string': b'',
+                'headers': [(b'host', HOST.encode()), (b'cookie', cookie.encode())],
+                'client': ('127.0.0.1', 0),
+                'server': (HOST, 80),
+            }, receive, send)
+            disconnected.set()
+            return status[0]
+
+        return await self._drive(request, paths, options)
@@ -0,0 +1,203 @@
+"""
+Management command to measure how reads behave during a burst of vote writes.
+
+Usage:
+    python manage.py seed_data --parents 200
+    python manage.py benchmark_concurrency
+    python manage.py benchmark_concurrency --compare --duration 10 --writers 8 --readers 8
+
+Writer threads submit votes for the children of the benchmarked date group (an
+open group with the most votes) as fast as they can, while reader threads read
+its slot tallies and the votes of one family, as the results and list pages
+do. The command reports the latency of reads and writes, and the number of
+"database is locked" errors.
+
+With --compare on SQLite, the benchmark first runs with the former
+configuration (rollback journal, deferred transactions, default pragmas), then
+with the configured one (WAL, immediate transactions, busy_timeout...), to show
+that reads no longer wait for the writers.
+
+The votes of the children used by the writers are restored at the end. Run it
+on a database filled by seed_data, never on the production database.
+"""
+import random
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.db.models import Count
+from django.utils.translation import gettext as _
+from children.models import Child
+from voting.models import DateGroup, TimeSlot, TimeSlotTally, Vote
+from voting.submission import save_vote_choices
+
+# SQLite options before the production profile: Django defaults, rollback journal
+FORMER_SQLITE_OPTIONS = {'init_command': 'PRAGMA journal_mode=DELETE;'}
+
+
+class Command(BaseCommand):
+    help = _('Mesure les lectures pendant une rafale d\'écritures de votes')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=5, help=_('Durée de chaque mesure, en secondes'))
+        parser.add_argument('--writers', type=int, default=4, help=_('Nombre de threads écrivant des votes'))
+        parser.add_argument('--readers', type=int, default=4, help=_('Nombre de threads lisant les résultats'))
+        parser.add_argument('--compare', action='store_true', help=_('Compare avec l\'ancienne configuration SQLite'))
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise CommandError(_('Le benchmark nécessite une base de données sur disque.'))
+
+        date_group, child_ids = self._get_date_group()
+        time_slot_ids = list(TimeSlot.objects.filter(date_option__date_group=date_group).values_list('id', flat=True))
+        original_choices = {
+            (child_id, time_slot_id): ''
+            for child_id in child_ids for time_slot_id in time_slot_ids
+        }
+        original_choices.update({
+            (child_id, time_slot_id): choice
+            for child_id, time_slot_id, choice in Vote.objects.filter(
+                child_id__in=child_ids, time_slot_id__in=time_slot_ids
+            ).values_list('child_id', 'time_slot_id', 'choice')
+        })
+
+        self.stdout.write(
+            _('Groupe « %(title)s » (%(pk)s) : %(slots)s créneaux, %(children)s enfants') % {
+                'title': date_group.title, 'pk': date_group.pk,
+                'slots': len(time_slot_ids), 'children': len(child_ids),
+            }
+        )
+
+        phases = [False]
+        if options['compare']:
+            if connection.vendor != 'sqlite':
+                raise CommandError(_('--compare n\'est disponible qu\'avec SQLite.'))
+            phases = [True, False]
+
+        try:
+            for former in phases:
+                with self._configuration(former):
+                    journal_mode = self._current_journal_mode()
+                    result = self._run(date_group, child_ids, time_slot_ids, options)
+                label = _('ancienne configuration') if former else _('configuration actuelle')
+                self.stdout.write(f'\n{connection.vendor}, {label} ({journal_mode}):')
+                for kind in ('reads', 'writes'):
+                    timings = sorted(result[kind])
+                    if not timings:
+                        self.stdout.write(f"  {kind:<6}      0")
+                        continue
+                    self.stdout.write(
+                        f"  {kind:<6} {len(timings):>6}"
+                        f"  p50 {statistics.median(timings):8.2f} ms"
+                        f"  p95 {timings[int(len(timings) * 0.95)]:8.2f} ms"
+                        f"  max {timings[-1]:8.2f} ms"
+                    )
+                self.stdout.write(f"  {_('erreurs « database is locked »')} : {result['locked']}")
+        finally:
+            save_vote_choices(date_group, original_choices)
+
+        self.stdout.write(self.style.SUCCESS(_('Votes d\'origine restaurés.')))
+
+    def _get_date_group(self):
+        """Return the open date group with the most votes and its voting children"""
+        date_group = DateGroup.objects.open_for_voting().annotate(
+            votes_count=Count('date_options__time_slots__votes')
+        ).order_by('-votes_count').first()
+        if date_group is None:
+            raise CommandError(_('Aucun groupe de dates ouvert au vote trouvé, lancez d\'abord seed_data.'))
+        child_ids = list(Child.objects.filter(
+            votes__time_slot__date_option__date_group=date_group
+        ).distinct().values_list('id', flat=True))
+        if not child_ids:
+            raise CommandError(_('Aucun vote dans ce groupe de dates, lancez d\'abord seed_data.'))
+        return date_group, child_ids
+
+    def _run(self, date_group, child_ids, time_slot_ids, options):
+        """Run the writer and reader threads, return their timings in ms"""
+        result = {'reads': [], 'writes': [], 'locked': 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options['duration']
+
+        def record(kind, operation):
+            start = time.perf_counter()
+            try:
+                operation()
+            except OperationalError as exc:
+                if 'locked' not in str(exc):
+                    raise
+                with lock:
+                    result['locked'] += 1
+                return
+            with lock:
+                result[kind].append((time.perf_counter() - start) * 1000)
+
+        def writer(children):
+            rng = random.Random(children[0] if children else 0)
+            try:
+                while time.perf_counter() < deadline and children:
+                    choices = {
+                        (rng.choice(children), time_slot_id): rng.choice(['yes', 'no', 'maybe'])
+                        for time_slot_id in rng.sample(time_slot_ids, min(10, len(time_slot_ids)))
+                    }
+                    record('writes', lambda: save_vote_choices(date_group, choices))
+            finally:
+                connections.close_all()
+
+        def read(child_id):
+            list(TimeSlotTally.objects.filter(time_slot__date_option__date_group=date_group).values_list(
+                'time_slot_id', 'yes_count', 'no_count', 'maybe_count'
+            ))
+            list(Vote.objects.filter(
+                child_id=child_id, time_slot__date_option__date_group=date_group
+            ).values_list('time_slot_id', 'choice'))
+
+        def reader():
+            rng = random.Random()
+            try:
+                while time.perf_counter() < deadline:
+                    child_id = rng.choice(child_ids)
+                    record('reads', lambda: read(child_id))
+            finally:
+                connections.close_all()
+
+        # Each writer has its own children, as parents vote for their own children
+        threads = [
+            threading.Thread(target=writer, args=(child_ids[i::options['writers']],))
+            for i in range(options['writers'])
+        ] + [threading.Thread(target=reader) for _i in range(options['readers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return result
+
+    def _current_journal_mode(self):
+        if connection.vendor != 'sqlite':
+            return connection.vendor
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            return cursor.fetchone()[0].upper()
+
+    @contextmanager
+    def _configuration(self, former):
+        """Run the benchmark with the current or the former SQLite configuration"""
+        if not former:
+            yield
+            return
+        previous_options = connection.settings_dict.get('OPTIONS', {})
+        previous_mode = self._current_journal_mode()
+        # The journal mode is stored in the database file: switch it while no
+        # other connection is open
+        connections.close_all()
+        connection.settings_dict['OPTIONS'] = FORMER_SQLITE_OPTIONS
+        connection.ensure_connection()
+        try:
+            yield
+        finally:
+            connections.close_all()
+            connection.settings_dict['OPTIONS'] = previous_options
+            with connection.cursor() as cursor:
+                cursor.execute(f'PRAGMA journal_mode={previous_mode}')
@@ -0,0 +1,121 @@
+"""
+Management command to check that the parent results page renders in linear time.
+
+Usage:
+    python manage.py benchmark_results_render
+    python manage.py benchmark_results_render --sizes 10,50,100 --voters 100
+
+Synthetic date groups of increasing size are created inside a transaction that
+is rolled back at the end, so the command can safely run against any database.
+For each size, the async voting.views.results_view is run to completion for a
+parent and the best time over several runs is kept. The cache is disabled while
+the command runs, so every render computes the results, and no cache entry
+outlives the rolled back data. The command fails if the render time per date
+of the largest group exceeds the one of the smallest group by more than
+--max-ratio, which would mean rendering is no longer linear in the group size.
+"""
+import datetime
+import random
+import time
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory, override_settings
+from django.utils.translation import gettext as _
+from children.middleware import ParentChildrenMiddleware
+from children.models import Child
+from voting.models import DateGroup, DateOption, TimeSlot, Vote
+from voting.tallies import rebuild_tallies
+from voting.views import results_view
+
+DUMMY_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = _('Mesure le temps de rendu de la page de résultats parent selon la taille du groupe')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='5,10,20,40,80', help=_('Nombres de dates à tester, séparés par des virgules'))
+        parser.add_argument('--children', type=int, default=3, help=_('Nombre d\'enfants du parent'))
+        parser.add_argument('--voters', type=int, default=50, help=_('Nombre d\'autres enfants ayant voté'))
+        parser.add_argument('--repeat', type=int, default=5, help=_('Nombre de rendus par taille'))
+        parser.add_argument('--max-ratio', type=float, default=1.5, help=_('Écart maximal toléré du temps par date'))
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        random.seed(0)
+
+        with override_settings(CACHES=DUMMY_CACHES), transaction.atomic():
+            parent, children = self._create_family(options['children'], options['voters'])
+            view = async_to_sync(results_view)
+            timings = []
+            for size in sizes:
+                date_group = self._create_date_group(parent, size, children)
+                best = None
+                for _run in range(options['repeat']):
+                    request = self._build_request(parent, date_group)
+                    start = time.perf_counter()
+                    response = view(request, group_id=date_group.pk)
+                    elapsed = time.perf_counter() - start
+                    if response.status_code != 200:
+                        raise CommandError(
+                            _('La page de résultats a répondu %(status)s.') % {'status': response.status_code}
+                        )
+                    best = elapsed if best is None else min(best, elapsed)
+                timings.append((size, best))
+                self.stdout.write(f"  {size:>4} dates: {best * 1000:8.2f} ms ({best * 1000 / size:.3f} ms/date)")
+            transaction.set_rollback(True)
+
+        first_size, first_time = timings[0]
+        last_size, last_time = timings[-1]
+        ratio = (last_time / last_size) / (first_time / first_size)
+        if ratio > options['max_ratio']:
+            raise CommandError(
+                _('Le rendu n\'est plus linéaire : le temps par date a été multiplié par %(ratio).2f.') % {'ratio': ratio}
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                _('Rendu linéaire : rapport du temps par date de %(ratio).2f.') % {'ratio': ratio}
+            )
+        )
+
+    def _build_request(self, parent, date_group):
+        """Build a request of the parent, with the attributes set by the middlewares"""
+        request = RequestFactory().get(f'/voting/{date_group.pk}/results/')
+        request.user = parent
+
+        async def auser():
+            return parent
+
+        request.auser = auser
+        ParentChildrenMiddleware(lambda request: None).process_request(request)
+        return request
+
+    def _create_family(self, children_count, voters_count):
+        """Create the benchmarked parent and the other voting children"""
+        User = get_user_model()
+        parent = User.objects.create_user('benchmark-parent', is_parent=True)
+        other_parent = User.objects.create_user('benchmark-others', is_parent=True)
+        birth_date = datetime.date(2020, 1, 1)
+        Child.objects.bulk_create(
+            [Child(parent=parent, first_name=f'Enfant{i}', last_name='Benchmark', birth_date=birth_date) for i in range(children_count)]
+            + [Child(parent=other_parent, first_name=f'Voisin{i}', last_name='Benchmark', birth_date=birth_date) for i in range(voters_count)]
+        )
+        return parent, list(Child.objects.filter(parent__in=[parent, other_parent]))
+
+    def _create_date_group(self, parent, size, children):
+        """Create a date group of the given size with a vote and tallies for every cell"""
+        date_group = DateGroup.objects.create(title=f'Benchmark {size}', created_by=parent)
+        first_date = datetime.date(2030, 1, 1)
+        for day in range(size):
+            DateOption.objects.create(date_group=date_group, date=first_date + datetime.timedelta(days=day))
+        time_slots = TimeSlot.objects.filter(date_option__date_group=date_group)
+        Vote.objects.bulk_create([
+            Vote(child=child, time_slot=time_slot, choice=random.choice(['yes', 'no', 'maybe']))
+            for child in children
+            for time_slot in time_slots
+        ])
+        rebuild_tallies(time_slots)
+        return date_group
@@ -0,0 +1,102 @@
+"""
+Management command to check that the hot queries use an index.
+
+Usage:
+    python manage.py check_query_plans
+    python manage.py check_query_plans --verbose-plans
+
+Runs EXPLAIN for each frequent query of the application against the current
+database and fails if one of them reads a table with a full scan, be it the
+table of the queried model or a joined one, which means an index is missing or
+no longer usable. Scanning a partial index (such as the one on parents) is
+accepted, as it only holds the wanted rows.
+
+Supported on SQLite and PostgreSQL. On PostgreSQL, sequential scans are
+disabled for the check, so that the planner still picks the indexes on a small
+database.
+"""
+import datetime
+import re
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.translation import gettext as _
+from admin_panel.search import prefix_search
+from children.models import Child
+from voting.models import DateGroup, Vote
+
+
+class Command(BaseCommand):
+    help = _('Vérifie avec EXPLAIN que les requêtes fréquentes utilisent un index')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help=_('Affiche le plan de chaque requête'))
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('sqlite', 'postgresql'):
+            raise CommandError(_('Base de données non prise en charge : %(vendor)s') % {'vendor': connection.vendor})
+
+        failures = []
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+            for name, queryset in self._get_queries():
+                plan = queryset.explain()
+                full_scans = self._full_scans(plan)
+                if options['verbose_plans'] or full_scans:
+                    self.stdout.write(f'{name}:\n{plan}\n')
+                if full_scans:
+                    failures.append(name)
+                    self.stdout.write(self.style.ERROR(f'  - {name}: {_("parcours complet de")} {", ".join(full_scans)}'))
+                else:
+                    self.stdout.write(f'  - {name}: OK')
+
+        if failures:
+            raise CommandError(
+                _('%(count)s requête(s) sans index : %(names)s') % {'count': len(failures), 'names': ', '.join(failures)}
+            )
+        self.stdout.write(self.style.SUCCESS(_('Toutes les requêtes fréquentes utilisent un index.')))
+
+    def _get_queries(self):
+        """The hot queries of the application, as (name, queryset) pairs"""
+        # Any id will do, EXPLAIN does not need matching rows
+        parent_id = child_id = date_group_id = time_slot_id = 1
+        today = datetime.date.today()
+        return [
+            ('save_vote_choices', Vote.objects.filter(
+                child_id__in=[child_id], time_slot__date_option__date_group_id=date_group_id
+            )),
+            ('slot_votes_by_choice', Vote.objects.filter(time_slot_id=time_slot_id, choice='yes')),
+            ('export_yes_votes', Vote.objects.filter(
+                time_slot__date_option__date_group_id=date_group_id, choice='yes'
+            )),
+            ('close_expired_votes', DateGroup.objects.expired(today)),
+            ('date_group_list_active', DateGroup.objects.filter(status='active')),
+            ('date_group_list_archive', DateGroup.objects.filter(status='closed')),
+            ('parent_children', Child.objects.filter(parent_id=parent_id)),
+            ('parents_list', get_user_model().objects.filter(is_parent=True).order_by('last_name', 'first_name')),
+            ('parents_search', prefix_search(
+                get_user_model().objects.filter(is_parent=True), 'a', ['last_name', 'first_name', 'username']
+            )),
+            ('children_search', prefix_search(Child.objects.all(), 'a', ['last_name', 'first_name'])),
+        ]
+
+    def _full_scans(self, plan):
+        """The tables of the application that the plan reads whole, joined ones included"""
+        models_by_table = {model._meta.db_table: model for model in apps.get_models()}
+        if connection.vendor == 'postgresql':
+            tables = re.findall(r'Seq Scan on (\w+)', plan)
+            return sorted({table for table in tables if table in models_by_table})
+        tables = set()
+        for match in re.finditer(r'\bSCAN (?:TABLE )?(\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX (\w+))?', plan):
+            table, index = match.groups()
+            model = models_by_table.get(table)
+            if model is None:
+                continue
+            partial_indexes = {index.name for index in model._meta.indexes if index.condition is not None}
+            if index not in partial_indexes:
+                tables.add(table)
+        return sorted(tables)
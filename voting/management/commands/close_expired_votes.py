@@ -19,6 +19,7 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 from django.utils.translation import gettext as _
 from voting.models import DateGroup
+from voting.snapshots import write_results_snapshot
 
 
 class Command(BaseCommand):
@@ -28,20 +29,20 @@ class Command(BaseCommand):
         """Close date groups where the closing date has passed"""
         today = timezone.now().date()
         
-        # Find all active date groups with a closing date that has passed
-        expired_groups = DateGroup.objects.filter(
-            status='active',
-            vote_closing_date__isnull=False,
-            vote_closing_date__lt=today
-        )
-        
         # Get list of groups before updating (since update() doesn't return objects)
-        expired_groups_list = list(expired_groups.values('id', 'title', 'vote_closing_date'))
-        count = len(expired_groups_list)
+        expired_groups_list = list(DateGroup.objects.expired(today).values('id', 'title', 'vote_closing_date'))
+        
+        # Groups may also be closed on the first display of the lists after
+        # their closing date, in which case there is nothing left to do
+        count = DateGroup.objects.close_expired(today)
+
+        # Freeze the results of the groups closed here, instead of on their first read
+        for date_group in DateGroup.objects.filter(
+            pk__in=[group['id'] for group in expired_groups_list], status='closed'
+        ):
+            write_results_snapshot(date_group)
         
         if count > 0:
-            # Update status to 'closed'
-            expired_groups.update(status='closed')
             self.stdout.write(
                 self.style.SUCCESS(
                     _('%(count)s groupe(s) de dates ont été fermé(s) automatiquement.') % {'count': count}
@@ -0,0 +1,48 @@
+"""
+Management command to rebuild and verify the per-slot vote tallies.
+
+Usage:
+    python manage.py rebuild_vote_tallies            # recount and fix drifted tallies
+    python manage.py rebuild_vote_tallies --check    # only verify, fail on mismatch
+    python manage.py rebuild_vote_tallies --group 12 # limit to one date group
+
+The tallies are maintained incrementally by every vote write; this command
+recounts the Vote table and compares it with the stored TimeSlotTally rows.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.translation import gettext as _
+from voting.models import TimeSlot
+from voting.tallies import rebuild_tallies
+
+
+class Command(BaseCommand):
+    help = _('Recalcule et vérifie les décomptes de votes par créneau')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help=_('Vérifie seulement, sans corriger'))
+        parser.add_argument('--group', type=int, help=_('Identifiant du groupe de dates à traiter'))
+
+    def handle(self, *args, **options):
+        time_slots = TimeSlot.objects.all()
+        if options['group']:
+            time_slots = time_slots.filter(date_option__date_group_id=options['group'])
+
+        mismatches = rebuild_tallies(time_slots, dry_run=options['check'])
+
+        for time_slot_id, stored, actual in mismatches:
+            self.stdout.write(
+                f"  - {_('créneau')} {time_slot_id}: {stored or _('absent')} -> {actual}"
+            )
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS(_('Tous les décomptes de votes sont à jour.')))
+        elif options['check']:
+            raise CommandError(
+                _('%(count)s décompte(s) de votes incorrect(s).') % {'count': len(mismatches)}
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    _('%(count)s décompte(s) de votes corrigé(s).') % {'count': len(mismatches)}
+                )
+            )
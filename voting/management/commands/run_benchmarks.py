@@ -0,0 +1,317 @@
+"""
+Management command to benchmark the main pages against the current database.
+
+Usage:
+    python manage.py seed_data --parents 500 --groups 40
+    python manage.py run_benchmarks
+    python manage.py run_benchmarks --iterations 50 --output benchmarks/after.json
+    python manage.py run_benchmarks --scenarios results_view,admin_results_view
+
+Each scenario drives a view with the Django test client (or runs a management
+command) as a parent or an administrator, and reports latency percentiles, the
+number of SQL queries and the peak Python memory allocated. Latencies and query
+counts come from the timed iterations; the peak memory is measured by one more
+iteration run under tracemalloc, which would otherwise distort the timings.
+
+The benchmarked date group is an open group with the most votes, unless --group
+is given. The benchmark writes to the database: vote submissions, exports and
+closed groups are recorded like real ones. Run it on a database filled by
+seed_data, never on the production database.
+
+Results are written to a JSON file so runs can be compared over time.
+"""
+import datetime
+import json
+import os
+import statistics
+import subprocess
+import time
+import tracemalloc
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from admin_panel.export_jobs import export_cache_key, run_export_job
+from admin_panel.models import ExportJob
+from children.models import Child
+from voting.models import DateGroup, DateOption, Vote
+
+PERCENTILES = (50, 90, 95, 99)
+# Title of the expired date groups created for the close_expired_votes scenario
+EXPIRED_GROUP_TITLE = 'Benchmark close_expired_votes'
+
+
+def percentile(sorted_values, pct):
+    """Percentile of sorted values, interpolated between the closest ranks"""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+class Scenario:
+    """A benchmarked operation
+
+    ``run`` is timed; ``setup``, called before each run, and ``teardown``, called
+    once at the end, are not.
+    """
+
+    def __init__(self, name, run, setup=None, teardown=None):
+        self.name = name
+        self.run = run
+        self.setup = setup
+        self.teardown = teardown
+
+
+class Command(BaseCommand):
+    help = _('Mesure les performances des pages principales sur la base actuelle')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help=_('Nombre d\'itérations mesurées par scénario'))
+        parser.add_argument('--warmup', type=int, default=2, help=_('Nombre d\'itérations de préchauffage non mesurées'))
+        parser.add_argument('--group', type=int, help=_('Identifiant du groupe de dates à utiliser'))
+        parser.add_argument('--scenarios', help=_('Scénarios à exécuter, séparés par des virgules'))
+        parser.add_argument('--output', help=_('Fichier JSON des résultats (par défaut dans benchmarks/)'))
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError(_('Il faut au moins une itération.'))
+
+        date_group = self._get_date_group(options['group'])
+        parent = self._get_parent(date_group)
+        admin = get_user_model().objects.filter(is_admin=True).order_by('pk').first()
+        if admin is None:
+            raise CommandError(_('Aucun administrateur trouvé, lancez d\'abord seed_data.'))
+
+        parent_client = Client()
+        parent_client.force_login(parent)
+        admin_client = Client()
+        admin_client.force_login(admin)
+
+        scenarios = self._get_scenarios(date_group, parent, parent_client, admin_client)
+        if options['scenarios']:
+            names = options['scenarios'].split(',')
+            unknown = set(names) - {scenario.name for scenario in scenarios}
+            if unknown:
+                raise CommandError(_('Scénario(s) inconnu(s) : %(names)s') % {'names': ', '.join(sorted(unknown))})
+            scenarios = [scenario for scenario in scenarios if scenario.name in names]
+
+        self.stdout.write(
+            _('Groupe « %(title)s » (%(pk)s), parent %(parent)s, administrateur %(admin)s') % {
+                'title': date_group.title, 'pk': date_group.pk, 'parent': parent, 'admin': admin,
+            }
+        )
+
+        results = {}
+        # The test client uses the "testserver" host
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for scenario in scenarios:
+                try:
+                    results[scenario.name] = self._run_scenario(scenario, options['iterations'], options['warmup'])
+                finally:
+                    if scenario.teardown:
+                        scenario.teardown()
+                result = results[scenario.name]
+                self.stdout.write(
+                    f"  {scenario.name:<22} p50 {result['latency_ms']['p50']:8.2f} ms"
+                    f"  p95 {result['latency_ms']['p95']:8.2f} ms"
+                    f"  {result['queries']['median']:>5} req."
+                    f"  {result['peak_memory_kb']:>8} Kio"
+                )
+
+        report = {
+            'created_at': timezone.now().isoformat(),
+            'revision': self._get_revision(),
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'warmup': options['warmup'],
+            'dataset': self._describe_dataset(date_group),
+            'scenarios': results,
+        }
+        output = options['output'] or os.path.join(
+            settings.BASE_DIR, 'benchmarks', f"{timezone.now():%Y%m%d-%H%M%S}.json"
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, 'w') as fileobj:
+            json.dump(report, fileobj, indent=2)
+        self.stdout.write(self.style.SUCCESS(_('Résultats enregistrés dans %(path)s') % {'path': output}))
+
+    def _get_date_group(self, group_id):
+        """Return the benchmarked date group: an open group with the most votes"""
+        if group_id:
+            date_group = DateGroup.objects.filter(pk=group_id).first()
+        else:
+            date_group = DateGroup.objects.open_for_voting().annotate(
+                votes_count=Count('date_options__time_slots__votes')
+            ).order_by('-votes_count').first()
+        if date_group is None or not date_group.can_vote():
+            raise CommandError(_('Aucun groupe de dates ouvert au vote trouvé, lancez d\'abord seed_data.'))
+        return date_group
+
+    def _get_parent(self, date_group):
+        """Return the parent with the most children having voted in the date group"""
+        child = Child.objects.filter(
+            votes__time_slot__date_option__date_group=date_group
+        ).values('parent_id').annotate(count=Count('id', distinct=True)).order_by('-count').first()
+        if child is None:
+            raise CommandError(_('Aucun vote dans ce groupe de dates, lancez d\'abord seed_data.'))
+        return get_user_model().objects.get(pk=child['parent_id'])
+
+    def _get_scenarios(self, date_group, parent, parent_client, admin_client):
+        vote_url = reverse('voting:vote', args=[date_group.pk])
+        export_url = reverse('admin_panel:export_excel', args=[date_group.pk])
+
+        def get(client, url, status=200):
+            def run():
+                response = client.get(url)
+                if response.status_code != status:
+                    raise CommandError(f'GET {url}: {response.status_code}')
+            return run
+
+        # Vote submissions alternate between the current choices and the opposite
+        # ones, so that every submission writes each cell
+        current_choices = {
+            f'choice_{child_id}_{time_slot_id}': choice
+            for child_id, time_slot_id, choice in Vote.objects.filter(
+                child__parent=parent, time_slot__date_option__date_group=date_group
+            ).values_list('child_id', 'time_slot_id', 'choice')
+        }
+        opposite = {'yes': 'no', 'no': 'yes', 'maybe': 'yes'}
+        payloads = [
+            {key: opposite[choice] for key, choice in current_choices.items()},
+            current_choices,
+        ]
+
+        def post_votes():
+            response = parent_client.post(vote_url, payloads[0])
+            if response.status_code != 302:
+                raise CommandError(f'POST {vote_url}: {response.status_code}')
+            payloads.reverse()
+
+        def restore_votes():
+            # End with the votes as they were before the benchmark
+            if payloads[0] is not current_choices:
+                parent_client.post(vote_url, current_choices)
+
+        # Exports are built synchronously, in place of the background thread
+        def prepare_export():
+            DateGroup.bump_data_version(pk=date_group.pk)
+            date_group.refresh_from_db(fields=['data_version'])
+            ExportJob.objects.create(date_group=date_group, cache_key=export_cache_key(date_group))
+
+        def export():
+            job = ExportJob.objects.filter(date_group=date_group, status='pending').latest('created_at')
+            run_export_job(job.pk)
+            response = admin_client.get(export_url)
+            if response.status_code != 200:
+                raise CommandError(f'GET {export_url}: {response.status_code}')
+            b''.join(response.streaming_content)
+            response.close()
+
+        def create_expired_groups():
+            date_groups = DateGroup.objects.bulk_create([
+                DateGroup(
+                    title=EXPIRED_GROUP_TITLE,
+                    created_by=date_group.created_by,
+                    vote_closing_date=timezone.now().date() - datetime.timedelta(days=1),
+                )
+                for _i in range(10)
+            ])
+            DateOption.objects.bulk_create([
+                DateOption(date_group=expired_group, date=timezone.now().date())
+                for expired_group in date_groups
+            ])
+
+        def delete_expired_groups():
+            DateGroup.objects.filter(title=EXPIRED_GROUP_TITLE).delete()
+
+        return [
+            Scenario('date_group_list', get(parent_client, reverse('voting:list'))),
+            Scenario('vote_view_get', get(parent_client, vote_url)),
+            Scenario('vote_view_post', post_votes, teardown=restore_votes),
+            Scenario('results_view', get(parent_client, reverse('voting:results', args=[date_group.pk]))),
+            Scenario('admin_results_view', get(admin_client, reverse('admin_panel:results', args=[date_group.pk]))),
+            Scenario('export_excel', export, setup=prepare_export),
+            Scenario('dashboard', get(admin_client, reverse('admin_panel:dashboard'))),
+            Scenario('staffing_plan', get(admin_client, reverse('admin_panel:staffing_plan'))),
+            Scenario(
+                'close_expired_votes',
+                lambda: call_command('close_expired_votes', stdout=StringIO()),
+                setup=create_expired_groups,
+                teardown=delete_expired_groups,
+            ),
+        ]
+
+    def _run_scenario(self, scenario, iterations, warmup):
+        timings = []
+        queries = []
+        for i in range(warmup + iterations):
+            if scenario.setup:
+                scenario.setup()
+            with CaptureQueriesContext(connection) as context:
+                start = time.perf_counter()
+                scenario.run()
+                elapsed = time.perf_counter() - start
+            if i >= warmup:
+                timings.append(elapsed * 1000)
+                queries.append(len(context.captured_queries))
+
+        if scenario.setup:
+            scenario.setup()
+        tracemalloc.start()
+        try:
+            scenario.run()
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        timings.sort()
+        return {
+            'latency_ms': {
+                'min': round(timings[0], 3),
+                'mean': round(statistics.mean(timings), 3),
+                **{f'p{pct}': round(percentile(timings, pct), 3) for pct in PERCENTILES},
+                'max': round(timings[-1], 3),
+            },
+            'queries': {
+                'min': min(queries),
+                'median': statistics.median_low(queries),
+                'max': max(queries),
+            },
+            'peak_memory_kb': round(peak / 1024),
+        }
+
+    def _describe_dataset(self, date_group):
+        User = get_user_model()
+        return {
+            'parents': User.objects.filter(is_parent=True).count(),
+            'children': Child.objects.count(),
+            'date_groups': DateGroup.objects.count(),
+            'votes': Vote.objects.count(),
+            'group': {
+                'id': date_group.pk,
+                'dates': date_group.date_options.count(),
+                'votes': Vote.objects.filter(time_slot__date_option__date_group=date_group).count(),
+            },
+        }
+
+    def _get_revision(self):
+        """Git revision of the code, if available"""
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,205 @@
+"""
+Management command to fill the database with a synthetic dataset.
+
+Usage:
+    python manage.py seed_data
+    python manage.py seed_data --parents 500 --groups 40 --dates 15
+    python manage.py seed_data --flush --password secret
+
+Creates an administrator (seed-admin), parents with one to four children, date
+groups of consecutive week days (past ones closed, upcoming ones active) and
+the votes of the children, with realistic distributions: not every child takes
+part in every group, attended days are mostly full days, lunch is skipped more
+often than the morning or the afternoon, and a few answers are "maybe".
+
+Every seeded account has a username starting with --prefix; --flush deletes
+them, with their children, votes and date groups, before seeding again. The
+rows are bulk inserted and the vote tallies rebuilt at the end, so large
+datasets are created quickly. Meant for development and benchmark databases
+only (see run_benchmarks).
+"""
+import datetime
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from children.models import Child
+from voting.models import DateGroup, DateOption, TimeSlot, Vote
+from voting.tallies import rebuild_tallies
+
+FIRST_NAMES = [
+    'Léa', 'Emma', 'Jade', 'Louise', 'Alice', 'Chloé', 'Lina', 'Rose', 'Anna', 'Mila',
+    'Gabriel', 'Léo', 'Raphaël', 'Arthur', 'Louis', 'Jules', 'Adam', 'Lucas', 'Hugo', 'Noé',
+]
+LAST_NAMES = [
+    'Martin', 'Bernard', 'Thomas', 'Petit', 'Robert', 'Richard', 'Durand', 'Dubois', 'Moreau', 'Laurent',
+    'Simon', 'Michel', 'Lefebvre', 'Leroy', 'Roux', 'David', 'Bertrand', 'Morel', 'Fournier', 'Girard',
+]
+GROUP_TITLES = ['Vacances d\'hiver', 'Vacances de printemps', 'Vacances d\'été', 'Vacances de la Toussaint', 'Mercredis']
+
+# Weights of the number of children per family
+CHILDREN_PER_PARENT = {1: 45, 2: 40, 3: 12, 4: 3}
+# Probability for a child attending a day to be registered for each period
+PERIOD_ATTENDANCE = {'morning': 0.95, 'lunch': 0.75, 'afternoon': 0.85}
+
+
+class Command(BaseCommand):
+    help = _('Remplit la base avec un jeu de données synthétique')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--parents', type=int, default=100, help=_('Nombre de parents'))
+        parser.add_argument('--groups', type=int, default=10, help=_('Nombre de groupes de dates'))
+        parser.add_argument('--dates', type=int, default=10, help=_('Nombre moyen de dates par groupe'))
+        parser.add_argument('--closed', type=float, default=0.6, help=_('Proportion de groupes fermés'))
+        parser.add_argument('--participation', type=float, default=0.6, help=_('Probabilité qu\'un enfant vote dans un groupe'))
+        parser.add_argument('--attendance', type=float, default=0.7, help=_('Probabilité qu\'un enfant votant vienne un jour donné'))
+        parser.add_argument('--maybe', type=float, default=0.05, help=_('Proportion de réponses « peut-être »'))
+        parser.add_argument('--prefix', default='seed', help=_('Préfixe des noms d\'utilisateur créés'))
+        parser.add_argument('--password', help=_('Mot de passe des comptes créés (aucun par défaut)'))
+        parser.add_argument('--seed', type=int, default=0, help=_('Graine du générateur aléatoire'))
+        parser.add_argument('--flush', action='store_true', help=_('Supprime d\'abord les données générées précédemment'))
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        User = get_user_model()
+        prefix = options['prefix']
+
+        with transaction.atomic():
+            if options['flush']:
+                deleted, _details = User.objects.filter(username__startswith=f'{prefix}-').delete()
+                self.stdout.write(_('%(count)s objet(s) supprimé(s).') % {'count': deleted})
+            elif User.objects.filter(username=f'{prefix}-admin').exists():
+                raise CommandError(
+                    _('Des données générées existent déjà, utilisez --flush pour les remplacer.')
+                )
+
+            admin = self._create_user(User, f'{prefix}-admin', options['password'], is_admin=True, first_name='Admin', last_name='Seed')
+            children = self._create_families(User, prefix, options['parents'], options['password'])
+            date_groups = self._create_date_groups(admin, options['groups'], options['dates'], options['closed'])
+            time_slots = TimeSlot.objects.filter(date_option__date_group__in=date_groups)
+            votes_count = self._create_votes(children, time_slots, options)
+            rebuild_tallies(time_slots)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                _('%(parents)s parent(s), %(children)s enfant(s), %(groups)s groupe(s) de dates et %(votes)s vote(s) créés.') % {
+                    'parents': options['parents'],
+                    'children': len(children),
+                    'groups': len(date_groups),
+                    'votes': votes_count,
+                }
+            )
+        )
+
+    def _create_user(self, User, username, password, **fields):
+        return User.objects.create(username=username, password=make_password(password), **fields)
+
+    def _create_families(self, User, prefix, parents_count, password):
+        """Create the parents and their children, siblings sharing a last name"""
+        # Hash the password once, hashing it for every parent would be slow
+        password = make_password(password)
+        parents = User.objects.bulk_create([
+            User(
+                username=f'{prefix}-parent-{i}',
+                password=password,
+                first_name=self.random.choice(FIRST_NAMES),
+                last_name=self.random.choice(LAST_NAMES),
+                is_parent=True,
+            )
+            for i in range(1, parents_count + 1)
+        ])
+
+        today = timezone.now().date()
+        children = []
+        sizes, weights = zip(*CHILDREN_PER_PARENT.items())
+        for parent in parents:
+            count = self.random.choices(sizes, weights)[0]
+            # Children from 3 to 12 years old, siblings at least a year apart
+            birth_date = today - datetime.timedelta(days=self.random.randint(3 * 365, 12 * 365))
+            for _i in range(count):
+                children.append(Child(
+                    parent=parent,
+                    first_name=self.random.choice(FIRST_NAMES),
+                    last_name=parent.last_name,
+                    birth_date=birth_date,
+                ))
+                birth_date += datetime.timedelta(days=self.random.randint(365, 3 * 365))
+                if birth_date > today - datetime.timedelta(days=3 * 365):
+                    break
+        return Child.objects.bulk_create(children)
+
+    def _create_date_groups(self, admin, groups_count, dates_count, closed_ratio):
+        """Create date groups of consecutive week days, the past ones closed"""
+        today = timezone.now().date()
+        closed_count = round(groups_count * closed_ratio)
+        date_groups = []
+        dates = []
+        for i in range(groups_count):
+            closed = i < closed_count
+            # Closed groups are spread over the past year, active ones over the next months
+            if closed:
+                start = today - datetime.timedelta(days=self.random.randint(30, 365))
+            else:
+                start = today + datetime.timedelta(days=self.random.randint(14, 120))
+            group_dates = []
+            day = start
+            while len(group_dates) < max(1, round(dates_count * self.random.uniform(0.5, 1.5))):
+                if day.weekday() < 5:
+                    group_dates.append(day)
+                day += datetime.timedelta(days=1)
+            date_groups.append(DateGroup(
+                title=f'{self.random.choice(GROUP_TITLES)} {start.year} ({i + 1})',
+                created_by=admin,
+                status='closed' if closed else 'active',
+                vote_closing_date=start - datetime.timedelta(days=7),
+            ))
+            dates.append(group_dates)
+
+        date_groups = DateGroup.objects.bulk_create(date_groups)
+        date_options = DateOption.objects.bulk_create([
+            DateOption(date_group=date_group, date=day)
+            for date_group, group_dates in zip(date_groups, dates)
+            for day in group_dates
+        ])
+        TimeSlot.objects.bulk_create([
+            TimeSlot(date_option=date_option, period=period)
+            for date_option in date_options
+            for period, _label in TimeSlot.PERIOD_CHOICES
+        ])
+        return date_groups
+
+    def _create_votes(self, children, time_slots, options):
+        """Create the votes of the children taking part in each date group"""
+        # date_group_id -> date_option_id -> [(time_slot_id, period)]
+        slots_by_group = {}
+        for time_slot_id, period, date_option_id, date_group_id in time_slots.values_list(
+            'id', 'period', 'date_option_id', 'date_option__date_group_id'
+        ):
+            slots_by_group.setdefault(date_group_id, {}).setdefault(date_option_id, []).append((time_slot_id, period))
+
+        votes = []
+        count = 0
+        for date_options in slots_by_group.values():
+            for child in children:
+                if self.random.random() >= options['participation']:
+                    continue
+                for slots in date_options.values():
+                    attending = self.random.random() < options['attendance']
+                    for time_slot_id, period in slots:
+                        if self.random.random() < options['maybe']:
+                            choice = 'maybe'
+                        elif attending and self.random.random() < PERIOD_ATTENDANCE[period]:
+                            choice = 'yes'
+                        else:
+                            choice = 'no'
+                        votes.append(Vote(child=child, time_slot_id=time_slot_id, choice=choice))
+            if len(votes) >= 5000:
+                Vote.objects.bulk_create(votes)
+                count += len(votes)
+                votes = []
+        Vote.objects.bulk_create(votes)
+        return count + len(votes)
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_tallies(apps, schema_editor):
+    """Count the existing votes of every time slot"""
+    TimeSlot = apps.get_model('voting', 'TimeSlot')
+    TimeSlotTally = apps.get_model('voting', 'TimeSlotTally')
+
+    counts = TimeSlot.objects.order_by().values('id').annotate(
+        yes=Count('votes', filter=Q(votes__choice='yes')),
+        no=Count('votes', filter=Q(votes__choice='no')),
+        maybe=Count('votes', filter=Q(votes__choice='maybe')),
+    )
+    TimeSlotTally.objects.bulk_create([
+        TimeSlotTally(time_slot_id=row['id'], yes_count=row['yes'], no_count=row['no'], maybe_count=row['maybe'])
+        for row in counts
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voting', '0008_add_vote_closing_date_to_dategroup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimeSlotTally',
+            fields=[
+                ('time_slot', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='tally', serialize=False, to='voting.timeslot', verbose_name='Créneau horaire')),
+                ('yes_count', models.IntegerField(default=0, verbose_name='Oui')),
+                ('no_count', models.IntegerField(default=0, verbose_name='Non')),
+                ('maybe_count', models.IntegerField(default=0, verbose_name='Peut-être')),
+            ],
+            options={
+                'verbose_name': 'Décompte des votes',
+                'verbose_name_plural': 'Décomptes des votes',
+            },
+        ),
+        migrations.RunPython(populate_tallies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voting', '0009_add_timeslottally'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dategroup',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Version des données'),
+        ),
+    ]
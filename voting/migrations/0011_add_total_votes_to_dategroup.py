@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:05
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def populate_total_votes(apps, schema_editor):
+    """Compute the total votes of the existing date groups from their tallies"""
+    DateGroup = apps.get_model('voting', 'DateGroup')
+    TimeSlotTally = apps.get_model('voting', 'TimeSlotTally')
+    totals = TimeSlotTally.objects.filter(
+        time_slot__date_option__date_group=OuterRef('pk')
+    ).order_by().values('time_slot__date_option__date_group').annotate(
+        total=Sum(F('yes_count') + F('no_count') + F('maybe_count'))
+    ).values('total')
+    DateGroup.objects.update(total_votes=Coalesce(Subquery(totals), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voting', '0010_add_data_version_to_dategroup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dategroup',
+            name='total_votes',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Total des votes'),
+        ),
+        migrations.RunPython(populate_total_votes, migrations.RunPython.noop),
+    ]
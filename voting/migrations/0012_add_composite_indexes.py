@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('children', '0004_add_composite_indexes'),
+        ('voting', '0011_add_total_votes_to_dategroup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dategroup',
+            index=models.Index(fields=['status', 'vote_closing_date'], name='dategroup_status_closing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='dategroup',
+            index=models.Index(fields=['status', '-created_at'], name='dategroup_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vote',
+            index=models.Index(fields=['time_slot', 'choice'], name='vote_slot_choice_idx'),
+        ),
+    ]
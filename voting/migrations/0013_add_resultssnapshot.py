@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('voting', '0012_add_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultsSnapshot',
+            fields=[
+                ('date_group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='results_snapshot', serialize=False, to='voting.dategroup', verbose_name='Groupe de dates')),
+                ('format_version', models.PositiveSmallIntegerField(verbose_name='Version du format')),
+                ('data', models.JSONField(verbose_name='Données')),
+                ('created_at', models.DateTimeField(auto_now=True, verbose_name='Date de création')),
+            ],
+            options={
+                'verbose_name': 'Instantané des résultats',
+                'verbose_name_plural': 'Instantanés des résultats',
+            },
+        ),
+    ]
@@ -1,6 +1,50 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
+from children.ages import age_at, age_band
+
+
+class DateGroupQuerySet(models.QuerySet):
+    """Date groups, with their voting state computed by the database"""
+
+    @staticmethod
+    def open_for_voting_q(today=None):
+        """Condition of the groups open for voting: active and not past their closing date"""
+        today = today or timezone.now().date()
+        return models.Q(status='active') & (
+            models.Q(vote_closing_date__isnull=True) | models.Q(vote_closing_date__gte=today)
+        )
+
+    def with_voting_state(self, today=None):
+        """Annotate is_open_for_voting, used by DateGroup.can_vote() instead of per-row checks"""
+        return self.annotate(is_open_for_voting=models.Case(
+            models.When(self.open_for_voting_q(today), then=models.Value(True)),
+            default=models.Value(False),
+            output_field=models.BooleanField(),
+        ))
+
+    def open_for_voting(self, today=None):
+        return self.filter(self.open_for_voting_q(today))
+
+    def expired(self, today=None):
+        """Active groups whose closing date has passed, waiting to be closed"""
+        today = today or timezone.now().date()
+        return self.filter(status='active', vote_closing_date__isnull=False, vote_closing_date__lt=today)
+
+    def close_expired(self, today=None):
+        """Close the expired groups in one UPDATE, invalidating their cached results
+
+        Idempotent, so it is run both by the close_expired_votes command and on
+        the first display of the group lists after a closing date. Nothing is
+        written when no group has expired. The results snapshots are left to
+        the command, or to the first read of each group (see voting.snapshots).
+        Returns the number of closed groups.
+        """
+        expired = self.expired(today)
+        if not expired.exists():
+            return 0
+        return expired.update(status='closed', data_version=models.F('data_version') + 1)
 
 
 class DateGroup(models.Model):
@@ -16,14 +60,41 @@ class DateGroup(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Date de création'))
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='active', verbose_name=_('Statut'))
     vote_closing_date = models.DateField(blank=True, null=True, verbose_name=_('Date de fermeture des votes'))
+    data_version = models.PositiveIntegerField(default=0, editable=False, verbose_name=_('Version des données'))
+    total_votes = models.IntegerField(default=0, editable=False, verbose_name=_('Total des votes'))
+
+    objects = DateGroupQuerySet.as_manager()
     
     class Meta:
         verbose_name = _('Groupe de dates')
         verbose_name_plural = _('Groupes de dates')
         ordering = ['-created_at']
+        indexes = [
+            # close_expired_votes
+            models.Index(fields=['status', 'vote_closing_date'], name='dategroup_status_closing_idx'),
+            # date_group_list and its archive pages
+            models.Index(fields=['status', '-created_at'], name='dategroup_status_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
+
+    # Fields only written by queries: bump_data_version() and the vote tallies
+    DENORMALIZED_FIELDS = ('data_version', 'total_votes')
+
+    def save(self, *args, **kwargs):
+        """Never write back the denormalized fields, which may be stale on this instance"""
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DENORMALIZED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def bump_data_version(cls, **lookups):
+        """Mark the data (votes, dates, status) of the matching date groups as changed"""
+        cls.objects.filter(**lookups).update(data_version=models.F('data_version') + 1)
     
     def is_closed(self):
         """Check if the date group is closed"""
@@ -34,9 +105,14 @@ class DateGroup(models.Model):
         return self.status == 'inactive'
     
     def can_vote(self):
-        """Check if voting is allowed for this date group"""
-        from django.utils import timezone
-        
+        """Check if voting is allowed for this date group
+
+        Uses the is_open_for_voting annotation of DateGroupQuerySet.with_voting_state()
+        when the group was loaded with it.
+        """
+        if hasattr(self, 'is_open_for_voting'):
+            return self.is_open_for_voting
+
         # Must be active status
         if self.status != 'active':
             return False
@@ -50,44 +126,22 @@ class DateGroup(models.Model):
         return True
 
     def get_total_votes(self):
-        """Get total number of votes for this date group"""
-        # Use string reference to avoid circular import
-        from django.apps import apps
-        Vote = apps.get_model('voting', 'Vote')
-        return Vote.objects.filter(time_slot__date_option__date_group=self).count()
+        """Get total number of votes for this date group, kept up to date with the slot tallies"""
+        return self.total_votes
 
     def get_vote_statistics(self):
-        """Get voting statistics for all date options and time slots in this group"""
-        stats = []
-        for option in self.date_options.all():
-            for time_slot in option.time_slots.all():
-                yes_votes = time_slot.votes.filter(choice='yes').select_related('child')
-                no_votes = time_slot.votes.filter(choice='no').select_related('child')
-                maybe_votes = time_slot.votes.filter(choice='maybe').select_related('child')
-                
-                yes_count = yes_votes.count()
-                no_count = no_votes.count()
-                maybe_count = maybe_votes.count()
-                total = yes_count + no_count + maybe_count
-                
-                stats.append({
-                    'option': option,
-                    'time_slot': time_slot,
-                    'yes': yes_count,
-                    'no': no_count,
-                    'maybe': maybe_count,
-                    'total': total,
-                    'yes_percent': (yes_count / total * 100) if total > 0 else 0,
-                    'no_percent': (no_count / total * 100) if total > 0 else 0,
-                    'maybe_percent': (maybe_count / total * 100) if total > 0 else 0,
-                    'yes_children': [str(vote.child) for vote in yes_votes.order_by('child__last_name', 'child__first_name')],
-                    'no_children': [str(vote.child) for vote in no_votes.order_by('child__last_name', 'child__first_name')],
-                    'maybe_children': [str(vote.child) for vote in maybe_votes.order_by('child__last_name', 'child__first_name')],
-                    # Expose vote objects for admin interactions
-                    'yes_votes': yes_votes.order_by('child__last_name', 'child__first_name'),
-                    'no_votes': no_votes.order_by('child__last_name', 'child__first_name'),
-                })
-        return stats
+        """Get voting statistics for all date options and time slots in this group
+
+        Closed groups are read from their frozen snapshot (see voting.snapshots).
+        Other groups are served from the results cache while data_version is
+        unchanged, otherwise computed with a constant number of queries (see
+        voting.statistics).
+        """
+        if self.status == 'closed':
+            from .snapshots import get_snapshot_statistics
+            return get_snapshot_statistics(self)
+        from .statistics import get_cached_vote_statistics
+        return get_cached_vote_statistics(self)
 
 
 class DateOption(models.Model):
@@ -105,12 +159,34 @@ class DateOption(models.Model):
     def save(self, *args, **kwargs):
         """Override save to automatically create time slots"""
         is_new = self.pk is None
-        super().save(*args, **kwargs)
-        if is_new:
-            # Create default time slots for new date option
-            TimeSlot.objects.get_or_create(date_option=self, period='morning')
-            TimeSlot.objects.get_or_create(date_option=self, period='lunch')
-            TimeSlot.objects.get_or_create(date_option=self, period='afternoon')
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new:
+                # Create default time slots for new date option, with their empty tallies
+                time_slots = TimeSlot.objects.bulk_create(
+                    [TimeSlot(date_option=self, period=period) for period, label in TimeSlot.PERIOD_CHOICES]
+                )
+                TimeSlotTally.objects.bulk_create([TimeSlotTally(time_slot=time_slot) for time_slot in time_slots])
+
+    @classmethod
+    def bulk_create_dates(cls, date_group, dates):
+        """Create the date options of a group with their time slots and tallies, in three bulk inserts
+
+        Dates the group already has are skipped. Returns the created date options.
+        """
+        with transaction.atomic():
+            existing = set(date_group.date_options.filter(date__in=dates).values_list('date', flat=True))
+            date_options = cls.objects.bulk_create([
+                cls(date_group=date_group, date=date)
+                for date in sorted(set(dates) - existing)
+            ])
+            time_slots = TimeSlot.objects.bulk_create([
+                TimeSlot(date_option=date_option, period=period)
+                for date_option in date_options
+                for period, label in TimeSlot.PERIOD_CHOICES
+            ])
+            TimeSlotTally.objects.bulk_create([TimeSlotTally(time_slot=time_slot) for time_slot in time_slots])
+        return date_options
 
 
 class TimeSlot(models.Model):
@@ -134,6 +210,14 @@ class TimeSlot(models.Model):
         return f"{self.date_option} - {period_display}"
 
 
+class VoteQuerySet(models.QuerySet):
+    def with_child_age(self):
+        """Annotate child_age and child_age_band, the age of the child on the date voted for"""
+        return self.annotate(
+            child_age=age_at(models.F('time_slot__date_option__date'), 'child__birth_date')
+        ).annotate(child_age_band=age_band('child_age'))
+
+
 class Vote(models.Model):
     CHOICE_CHOICES = [
         ('yes', _('Oui')),
@@ -145,13 +229,64 @@ class Vote(models.Model):
     child = models.ForeignKey('children.Child', on_delete=models.CASCADE, related_name='votes', verbose_name=_('Enfant'))
     choice = models.CharField(max_length=5, choices=CHOICE_CHOICES, verbose_name=_('Choix'))
     voted_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Date du vote'))
+
+    objects = VoteQuerySet.as_manager()
     
     class Meta:
         verbose_name = _('Vote')
         verbose_name_plural = _('Votes')
         unique_together = [['time_slot', 'child']]
         ordering = ['-voted_at']
+        indexes = [
+            # "yes" votes of a slot (results, exports)
+            models.Index(fields=['time_slot', 'choice'], name='vote_slot_choice_idx'),
+        ]
 
     def __str__(self):
         child_name = str(self.child) if self.child else "Unknown"
         return f"{child_name} - {self.time_slot} - {self.choice}"
+
+
+class TimeSlotTally(models.Model):
+    """Denormalized yes/no/maybe vote counts of a time slot
+
+    Maintained in the same transaction as every vote write (see voting.tallies),
+    so read paths can use these small rows instead of counting the Vote table.
+    Rebuild or verify with ``python manage.py rebuild_vote_tallies``.
+    """
+    time_slot = models.OneToOneField(TimeSlot, on_delete=models.CASCADE, primary_key=True, related_name='tally', verbose_name=_('Créneau horaire'))
+    yes_count = models.IntegerField(default=0, verbose_name=_('Oui'))
+    no_count = models.IntegerField(default=0, verbose_name=_('Non'))
+    maybe_count = models.IntegerField(default=0, verbose_name=_('Peut-être'))
+
+    class Meta:
+        verbose_name = _('Décompte des votes')
+        verbose_name_plural = _('Décomptes des votes')
+
+    def __str__(self):
+        return f"{self.time_slot} - {self.yes_count}/{self.no_count}/{self.maybe_count}"
+
+    @property
+    def total(self):
+        return self.yes_count + self.no_count + self.maybe_count
+
+
+class ResultsSnapshot(models.Model):
+    """Frozen results of a closed date group
+
+    Written when the group is closed and read by the results pages and exports
+    instead of the Vote table (see voting.snapshots). Deleted when an
+    administrator changes a vote of the closed group, when it is reopened, or
+    when a child who voted in it is edited or deleted.
+    """
+    date_group = models.OneToOneField(DateGroup, on_delete=models.CASCADE, primary_key=True, related_name='results_snapshot', verbose_name=_('Groupe de dates'))
+    format_version = models.PositiveSmallIntegerField(verbose_name=_('Version du format'))
+    data = models.JSONField(verbose_name=_('Données'))
+    created_at = models.DateTimeField(auto_now=True, verbose_name=_('Date de création'))
+
+    class Meta:
+        verbose_name = _('Instantané des résultats')
+        verbose_name_plural = _('Instantanés des résultats')
+
+    def __str__(self):
+        return str(self.date_group)
@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from children.models import Child
+from .models import DateGroup, DateOption
+from .snapshots import delete_child_results_snapshots
+from .tallies import refresh_vote_totals, remove_votes_from_tallies
+
+
+@receiver(pre_delete, sender=Child)
+def remove_child_votes_from_tallies(sender, instance, **kwargs):
+    """Keep the slot tallies and group versions in sync when a child's votes are cascade-deleted"""
+    remove_votes_from_tallies(instance.votes.all())
+    DateGroup.bump_data_version(date_options__time_slots__votes__child=instance)
+    delete_child_results_snapshots(instance)
+
+
+@receiver(post_save, sender=Child)
+def invalidate_child_date_groups(sender, instance, created, **kwargs):
+    """Children names appear in the results of the groups they voted in"""
+    if not created:
+        DateGroup.bump_data_version(date_options__time_slots__votes__child=instance)
+        delete_child_results_snapshots(instance)
+
+
+@receiver(post_delete, sender=DateOption)
+def refresh_date_group_total_votes(sender, instance, **kwargs):
+    """The votes of a deleted date are cascade-deleted with its slot tallies"""
+    refresh_vote_totals(DateGroup.objects.filter(pk=instance.date_group_id))
@@ -0,0 +1,171 @@
+"""
+Frozen results snapshots of closed date groups.
+
+Once a date group is closed its votes no longer change, except when an
+administrator corrects one on the results page. Its final results are then
+stored in a single ResultsSnapshot row: the dates, the time slots and, for each
+slot, the (vote id, child id) pairs of every choice, each child's name and birth
+date being stored once, and the age and age band of each voting child on each
+date, computed by the database. The vote counts are the lengths of these lists.
+
+The results pages and the Excel export of a closed group read the snapshot
+(one query) and rebuild the statistics from it, with the same shape as
+voting.statistics.get_vote_statistics(), using unsaved model instances. Their votes carry the child_age and
+child_age_band attributes of Vote.objects.with_child_age().
+
+Snapshots are written when a group is closed by close_expired_votes or the date
+group form, or on the first read of a group closed by the first display of the
+lists after its closing date. They are deleted by toggle_vote, when the group
+is reopened, or when a child who voted in it is edited or deleted (see
+voting.signals), so that snapshots never keep stale names, deleted votes or the
+personal data of a deleted child. A missing snapshot, or one in an older
+format, is rebuilt on the next read.
+"""
+import datetime
+
+from django.db import transaction
+
+from .statistics import _percent, get_vote_statistics
+
+# Version of the layout of ResultsSnapshot.data, older snapshots are rebuilt
+SNAPSHOT_FORMAT = 2
+
+CHOICES = ('yes', 'no', 'maybe')
+
+
+def build_snapshot_data(date_group):
+    """Serialize the current results of a date group"""
+    from .models import Vote
+
+    children = {}
+    dates = {}
+    slots = []
+    for stat in get_vote_statistics(date_group):
+        time_slot = stat['time_slot']
+        dates.setdefault(time_slot.date_option_id, time_slot.date_option.date.isoformat())
+        votes = {}
+        for choice in CHOICES:
+            votes[choice] = []
+            for vote in stat[f'{choice}_votes']:
+                child = vote.child
+                children.setdefault(str(child.id), [child.first_name, child.last_name, child.birth_date.isoformat()])
+                votes[choice].append([vote.id, child.id])
+        slots.append({
+            'id': time_slot.id,
+            'date_option': time_slot.date_option_id,
+            'period': time_slot.period,
+            'votes': votes,
+        })
+    ages = {}
+    for date_option_id, child_id, age, band in Vote.objects.filter(
+        time_slot__date_option__date_group=date_group
+    ).with_child_age().values_list(
+        'time_slot__date_option_id', 'child_id', 'child_age', 'child_age_band'
+    ).order_by().distinct():
+        ages.setdefault(str(date_option_id), {})[str(child_id)] = [age, band]
+    return {
+        'dates': [[date_option_id, date] for date_option_id, date in dates.items()],
+        'slots': slots,
+        'children': children,
+        'ages': ages,
+    }
+
+
+def write_results_snapshot(date_group):
+    """Freeze the current results of a date group, replacing its previous snapshot"""
+    from .models import ResultsSnapshot
+
+    data = build_snapshot_data(date_group)
+    ResultsSnapshot.objects.update_or_create(
+        date_group_id=date_group.pk,
+        defaults={'format_version': SNAPSHOT_FORMAT, 'data': data},
+    )
+    return data
+
+
+def delete_results_snapshot(date_group):
+    from .models import ResultsSnapshot
+
+    ResultsSnapshot.objects.filter(date_group_id=date_group.pk).delete()
+
+
+def delete_child_results_snapshots(child):
+    """Delete the snapshots of the groups a child voted in, once committed
+
+    The groups are looked up right away, as the votes of a deleted child are
+    gone after the commit. Deleting after the commit discards a snapshot that a
+    concurrent read may have written from the data before the change.
+    """
+    from .models import ResultsSnapshot
+
+    date_group_ids = list(ResultsSnapshot.objects.filter(
+        date_group__date_options__time_slots__votes__child=child
+    ).values_list('date_group_id', flat=True).distinct())
+    if date_group_ids:
+        transaction.on_commit(
+            lambda: ResultsSnapshot.objects.filter(date_group_id__in=date_group_ids).delete()
+        )
+
+
+def sync_results_snapshot(date_group):
+    """Write the snapshot of a closed group, delete the one of a reopened group"""
+    if date_group.status == 'closed':
+        write_results_snapshot(date_group)
+    else:
+        delete_results_snapshot(date_group)
+
+
+def get_snapshot_statistics(date_group):
+    """Get the statistics of a closed date group from its snapshot, writing it if needed"""
+    from children.models import Child
+    from .models import DateOption, ResultsSnapshot, TimeSlot, Vote
+
+    data = ResultsSnapshot.objects.filter(
+        date_group_id=date_group.pk, format_version=SNAPSHOT_FORMAT
+    ).values_list('data', flat=True).first()
+    if data is None:
+        data = write_results_snapshot(date_group)
+
+    options = {
+        date_option_id: DateOption(id=date_option_id, date_group_id=date_group.pk, date=datetime.date.fromisoformat(date))
+        for date_option_id, date in data['dates']
+    }
+    children = {
+        int(child_id): Child(id=int(child_id), first_name=first_name, last_name=last_name,
+                             birth_date=datetime.date.fromisoformat(birth_date))
+        for child_id, (first_name, last_name, birth_date) in data['children'].items()
+    }
+
+    stats = []
+    for slot in data['slots']:
+        option = options[slot['date_option']]
+        ages = data['ages'].get(str(option.id), {})
+        time_slot = TimeSlot(id=slot['id'], date_option=option, period=slot['period'])
+        votes = {choice: [] for choice in CHOICES}
+        for choice in CHOICES:
+            for vote_id, child_id in slot['votes'][choice]:
+                vote = Vote(id=vote_id, time_slot=time_slot, child=children[child_id], choice=choice)
+                vote.child_age, vote.child_age_band = ages[str(child_id)]
+                votes[choice].append(vote)
+        yes_count = len(votes['yes'])
+        no_count = len(votes['no'])
+        maybe_count = len(votes['maybe'])
+        total = yes_count + no_count + maybe_count
+        stats.append({
+            'option': option,
+            'time_slot': time_slot,
+            'yes': yes_count,
+            'no': no_count,
+            'maybe': maybe_count,
+            'total': total,
+            'yes_percent': _percent(yes_count, total),
+            'no_percent': _percent(no_count, total),
+            'maybe_percent': _percent(maybe_count, total),
+            'yes_children': [str(vote.child) for vote in votes['yes']],
+            'no_children': [str(vote.child) for vote in votes['no']],
+            'maybe_children': [str(vote.child) for vote in votes['maybe']],
+            'yes_votes': votes['yes'],
+            'no_votes': votes['no'],
+            'maybe_votes': votes['maybe'],
+        })
+    return stats
@@ -0,0 +1,119 @@
+"""
+Vote statistics engine for date groups.
+
+The statistics for a whole date group are computed with a constant number of
+queries, whatever the number of dates, time slots and votes:
+
+    1. one query returning every time slot of the group with its date option
+       and its yes/no/maybe counts, read from the TimeSlotTally rows;
+    2. one ordered query returning every vote of the group with its child,
+       used to build the per-slot children lists.
+
+The per-slot structure is then assembled in memory and has the same shape as
+the one historically returned by ``DateGroup.get_vote_statistics``.
+
+Computed statistics are cached under a key that includes the group's
+data_version, which every write to its votes, dates or status bumps in the
+same transaction. A changed group therefore gets a new key in every worker
+process, and stale entries simply expire.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.functions import Coalesce
+
+# Number of database queries issued by get_vote_statistics()
+STATISTICS_QUERY_COUNT = 2
+
+
+def _percent(count, total):
+    return (count / total * 100) if total > 0 else 0
+
+
+def get_vote_statistics(date_group):
+    """Get voting statistics for all date options and time slots of a date group"""
+    from .models import TimeSlot, Vote
+
+    time_slots = TimeSlot.objects.filter(
+        date_option__date_group=date_group
+    ).select_related('date_option').annotate(
+        yes_count=Coalesce('tally__yes_count', 0),
+        no_count=Coalesce('tally__no_count', 0),
+        maybe_count=Coalesce('tally__maybe_count', 0),
+    ).order_by('date_option__date', 'date_option_id', 'period')
+
+    votes = Vote.objects.filter(
+        time_slot__date_option__date_group=date_group
+    ).select_related('child').order_by('child__last_name', 'child__first_name', 'child_id')
+
+    # Group the votes by time slot and choice, keeping the children ordering
+    votes_by_slot = {}
+    for vote in votes:
+        slot_votes = votes_by_slot.setdefault(vote.time_slot_id, {'yes': [], 'no': [], 'maybe': []})
+        slot_votes.setdefault(vote.choice, []).append(vote)
+
+    stats = []
+    options = {}
+    empty = {'yes': [], 'no': [], 'maybe': []}
+    for time_slot in time_slots:
+        # Share a single DateOption instance between the slots of a same date
+        option = options.setdefault(time_slot.date_option_id, time_slot.date_option)
+        time_slot.date_option = option
+        slot_votes = votes_by_slot.get(time_slot.id, empty)
+
+        yes_count = time_slot.yes_count
+        no_count = time_slot.no_count
+        maybe_count = time_slot.maybe_count
+        total = yes_count + no_count + maybe_count
+
+        stats.append({
+            'option': option,
+            'time_slot': time_slot,
+            'yes': yes_count,
+            'no': no_count,
+            'maybe': maybe_count,
+            'total': total,
+            'yes_percent': _percent(yes_count, total),
+            'no_percent': _percent(no_count, total),
+            'maybe_percent': _percent(maybe_count, total),
+            'yes_children': [str(vote.child) for vote in slot_votes['yes']],
+            'no_children': [str(vote.child) for vote in slot_votes['no']],
+            'maybe_children': [str(vote.child) for vote in slot_votes['maybe']],
+            # Expose vote objects for admin interactions
+            'yes_votes': slot_votes['yes'],
+            'no_votes': slot_votes['no'],
+            'maybe_votes': slot_votes['maybe'],
+        })
+    return stats
+
+
+def statistics_cache_key(date_group):
+    return f'voting:statistics:{date_group.pk}:v{date_group.data_version}'
+
+
+def get_cached_vote_statistics(date_group):
+    """Get the vote statistics of a date group from the cache, computing them if needed"""
+    key = statistics_cache_key(date_group)
+    stats = cache.get(key)
+    if stats is None:
+        stats = get_vote_statistics(date_group)
+        cache.set(key, stats, settings.RESULTS_CACHE_TIMEOUT)
+    return stats
+
+
+async def aget_vote_matrix(date_group, children):
+    """Index the votes of some children for a date group
+
+    Returns a ``{child_id: {date_option_id: {period: choice}}}`` mapping built in
+    a single pass over one query, so templates can look each cell up directly
+    instead of scanning every vote.
+    """
+    from .models import Vote
+
+    matrix = {child.id: {} for child in children}
+    votes = Vote.objects.filter(
+        child__in=children,
+        time_slot__date_option__date_group=date_group
+    ).values_list('child_id', 'time_slot__date_option_id', 'time_slot__period', 'choice')
+    async for child_id, date_option_id, period, choice in votes:
+        matrix[child_id].setdefault(date_option_id, {})[period] = choice
+    return matrix
@@ -0,0 +1,78 @@
+"""
+Vote submission pipeline.
+
+Posted choices are diffed against the votes already stored for the same
+(child, time slot) cells, and only the differences are written, inside a single
+transaction: one query to load the existing votes, then at most one bulk
+insert, one bulk update and one delete. The per-slot tallies and the data
+version of the date group are updated in the same transaction, the tallies
+being locked before the votes are read (see voting.tallies.lock_tallies).
+"""
+from django.db import transaction
+
+from .tallies import apply_tally_deltas, lock_tallies, new_deltas
+
+VALID_CHOICES = ('yes', 'no', 'maybe')
+
+
+def save_vote_choices(date_group, choices):
+    """Apply posted vote choices to a date group
+
+    ``choices`` maps ``(child_id, time_slot_id)`` to the posted value: one of
+    VALID_CHOICES to set the vote, an empty string to clear it. Any other value
+    leaves the cell untouched.
+
+    Returns a ``(created, updated, deleted)`` tuple of counts. As with the
+    historical update_or_create loop, a valid choice posted for an existing vote
+    counts as updated even when the choice did not change.
+    """
+    from .models import DateGroup, Vote
+
+    child_ids = {child_id for child_id, _ in choices}
+    time_slot_ids = {time_slot_id for _, time_slot_id in choices}
+    created = updated = deleted = 0
+
+    with transaction.atomic():
+        lock_tallies(time_slot_ids)
+        existing = {
+            (vote.child_id, vote.time_slot_id): vote
+            for vote in Vote.objects.filter(
+                child_id__in=child_ids,
+                time_slot__date_option__date_group=date_group,
+            )
+        }
+
+        to_create = []
+        to_update = []
+        to_delete = []
+        deltas = new_deltas()
+        for (child_id, time_slot_id), choice in choices.items():
+            vote = existing.get((child_id, time_slot_id))
+            if choice in VALID_CHOICES:
+                if vote is None:
+                    to_create.append(Vote(child_id=child_id, time_slot_id=time_slot_id, choice=choice))
+                    deltas[time_slot_id][choice] += 1
+                    created += 1
+                else:
+                    updated += 1
+                    if vote.choice != choice:
+                        deltas[time_slot_id][vote.choice] -= 1
+                        deltas[time_slot_id][choice] += 1
+                        vote.choice = choice
+                        to_update.append(vote)
+            elif choice == '' and vote is not None:
+                to_delete.append(vote.pk)
+                deltas[time_slot_id][vote.choice] -= 1
+                deleted += 1
+
+        if to_create:
+            Vote.objects.bulk_create(to_create)
+        if to_update:
+            Vote.objects.bulk_update(to_update, ['choice'])
+        if to_delete:
+            Vote.objects.filter(pk__in=to_delete).delete()
+        apply_tally_deltas(deltas)
+        if to_create or to_update or to_delete:
+            DateGroup.bump_data_version(pk=date_group.pk)
+
+    return created, updated, deleted
@@ -0,0 +1,161 @@
+"""
+Maintenance of the denormalized TimeSlotTally counters.
+
+Every code path that writes votes records its changes as per-slot deltas and
+applies them with apply_tally_deltas() inside the same transaction as the vote
+write. Applying deltas costs at most three queries whatever the number of slots
+involved: one insert of the missing tally rows, one conditional UPDATE and one
+UPDATE of the stored total_votes of the date groups involved.
+
+Deltas are computed from the votes read in the transaction, so writers first
+lock the tallies of the slots they change with lock_tallies(): on PostgreSQL, in
+read committed, two concurrent saves could otherwise apply the same change
+twice.
+
+rebuild_tallies() recounts the Vote table and fixes any drift; it backs the
+``rebuild_vote_tallies`` management command.
+"""
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+
+CHOICES = ('yes', 'no', 'maybe')
+
+
+def new_deltas():
+    """Return an empty ``{time_slot_id: {choice: delta}}`` accumulator"""
+    return defaultdict(lambda: dict.fromkeys(CHOICES, 0))
+
+
+def lock_tallies(time_slot_ids):
+    """Lock the tallies of some time slots until the end of the transaction
+
+    Serializes the vote writers of a slot: the votes read after the lock include
+    the ones committed by the previous writer. The rows are locked in a fixed
+    order to avoid deadlocks. They are created with their time slots; SQLite,
+    whose write transactions are already serialized, has nothing to lock.
+    """
+    from .models import TimeSlotTally
+
+    if not connection.features.has_select_for_update or not time_slot_ids:
+        return
+    list(TimeSlotTally.objects.select_for_update().filter(
+        time_slot_id__in=time_slot_ids
+    ).order_by('time_slot_id').values_list('pk', flat=True))
+
+
+def apply_tally_deltas(deltas):
+    """Add per-slot vote count deltas to the tallies
+
+    ``deltas`` maps a time slot id to a ``{choice: delta}`` dict, as returned by
+    new_deltas(). Must be called in the transaction that writes the votes.
+    """
+    from .models import DateGroup, TimeSlotTally
+
+    deltas = {
+        time_slot_id: slot_deltas
+        for time_slot_id, slot_deltas in deltas.items()
+        if any(slot_deltas.values())
+    }
+    if not deltas:
+        return
+
+    with transaction.atomic():
+        TimeSlotTally.objects.bulk_create(
+            [TimeSlotTally(time_slot_id=time_slot_id) for time_slot_id in deltas],
+            ignore_conflicts=True,
+        )
+        updates = {}
+        for choice in CHOICES:
+            field = f'{choice}_count'
+            whens = [
+                When(time_slot_id=time_slot_id, then=F(field) + slot_deltas[choice])
+                for time_slot_id, slot_deltas in deltas.items()
+                if slot_deltas[choice]
+            ]
+            if whens:
+                updates[field] = Case(*whens, default=F(field))
+        TimeSlotTally.objects.filter(time_slot_id__in=deltas).update(**updates)
+        refresh_vote_totals(DateGroup.objects.filter(date_options__time_slots__in=list(deltas)))
+
+
+def refresh_vote_totals(date_groups):
+    """Recompute the stored total_votes of a queryset of date groups from their tallies"""
+    from .models import TimeSlotTally
+
+    totals = TimeSlotTally.objects.filter(
+        time_slot__date_option__date_group=OuterRef('pk')
+    ).order_by().values('time_slot__date_option__date_group').annotate(
+        total=Sum(F('yes_count') + F('no_count') + F('maybe_count'))
+    ).values('total')
+    date_groups.update(total_votes=Coalesce(Subquery(totals), 0))
+
+
+def remove_votes_from_tallies(votes):
+    """Subtract a queryset of votes, about to be deleted, from the tallies"""
+    deltas = new_deltas()
+    counts = votes.order_by().values('time_slot_id', 'choice').annotate(count=Count('id'))
+    for row in counts:
+        deltas[row['time_slot_id']][row['choice']] -= row['count']
+    apply_tally_deltas(deltas)
+
+
+def count_votes(time_slots):
+    """Count the votes of some time slots from the Vote table
+
+    Returns a ``{time_slot_id: (yes, no, maybe)}`` mapping.
+    """
+    return {
+        row['id']: (row['yes'], row['no'], row['maybe'])
+        for row in time_slots.order_by().values('id').annotate(
+            yes=Count('votes', filter=Q(votes__choice='yes')),
+            no=Count('votes', filter=Q(votes__choice='no')),
+            maybe=Count('votes', filter=Q(votes__choice='maybe')),
+        )
+    }
+
+
+def rebuild_tallies(time_slots=None, dry_run=False):
+    """Recount the votes and fix the tallies that do not match
+
+    Returns the list of ``(time_slot_id, stored, actual)`` mismatches, where
+    counts are ``(yes, no, maybe)`` tuples and ``stored`` is None for a missing
+    tally row. A missing row counts as no votes: it is created, but only
+    reported when the slot has votes. With ``dry_run`` the tallies are only
+    verified.
+    """
+    from .models import DateGroup, TimeSlot, TimeSlotTally
+
+    if time_slots is None:
+        time_slots = TimeSlot.objects.all()
+
+    with transaction.atomic():
+        actual = count_votes(time_slots)
+        stored = {
+            tally.time_slot_id: tally
+            for tally in TimeSlotTally.objects.filter(time_slot__in=time_slots)
+        }
+
+        mismatches = []
+        to_create = []
+        to_update = []
+        for time_slot_id, counts in actual.items():
+            tally = stored.get(time_slot_id)
+            if tally is None:
+                # A missing row reads as no votes, only a mismatch when the slot has some
+                if any(counts):
+                    mismatches.append((time_slot_id, None, counts))
+                to_create.append(TimeSlotTally(time_slot_id=time_slot_id, yes_count=counts[0], no_count=counts[1], maybe_count=counts[2]))
+            elif (tally.yes_count, tally.no_count, tally.maybe_count) != counts:
+                mismatches.append((time_slot_id, (tally.yes_count, tally.no_count, tally.maybe_count), counts))
+                tally.yes_count, tally.no_count, tally.maybe_count = counts
+                to_update.append(tally)
+
+        if not dry_run:
+            TimeSlotTally.objects.bulk_create(to_create)
+            TimeSlotTally.objects.bulk_update(to_update, ['yes_count', 'no_count', 'maybe_count'])
+            refresh_vote_totals(DateGroup.objects.filter(date_options__time_slots__in=time_slots))
+
+    return mismatches
@@ -1,3 +1,96 @@
-from django.test import TestCase
+import datetime
+import json
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from accounts.models import CustomUser
+from children.models import Child
+from .models import DateGroup, DateOption, TimeSlot, TimeSlotTally, Vote
+from .tallies import rebuild_tallies
+from .views import MAX_AUTOSAVE_CELLS
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class VoteCellsViewTests(TestCase):
+    """Autosave endpoint of the vote page"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.parent = CustomUser.objects.create_user('parent', password='1234', is_parent=True)
+        cls.other_parent = CustomUser.objects.create_user('other', password='1234', is_parent=True)
+        cls.child = Child.objects.create(parent=cls.parent, first_name='Léa', last_name='Martin', birth_date=datetime.date(2019, 5, 1))
+        cls.sibling = Child.objects.create(parent=cls.parent, first_name='Tom', last_name='Martin', birth_date=datetime.date(2016, 2, 1))
+        cls.other_child = Child.objects.create(parent=cls.other_parent, first_name='Zoé', last_name='Durand', birth_date=datetime.date(2018, 9, 1))
+        cls.date_group = DateGroup.objects.create(title='Vacances', created_by=cls.parent)
+        DateOption.objects.create(date_group=cls.date_group, date=datetime.date(2030, 7, 1))
+        DateOption.objects.create(date_group=cls.date_group, date=datetime.date(2030, 7, 2))
+        cls.time_slots = list(TimeSlot.objects.filter(date_option__date_group=cls.date_group))
+        cls.other_group = DateGroup.objects.create(title='Autre', created_by=cls.parent)
+        DateOption.objects.create(date_group=cls.other_group, date=datetime.date(2030, 8, 1))
+
+    def setUp(self):
+        self.client.force_login(self.parent)
+
+    def post_cells(self, cells, date_group=None):
+        url = reverse('voting:vote_cells', args=[(date_group or self.date_group).pk])
+        return self.client.post(url, json.dumps({'choices': cells}), content_type='application/json')
+
+    def cell(self, child, time_slot, choice):
+        return {'child': child.pk, 'time_slot': time_slot.pk, 'choice': choice}
+
+    def test_rejects_child_of_another_parent(self):
+        response = self.post_cells([
+            self.cell(self.child, self.time_slots[0], 'yes'),
+            self.cell(self.other_child, self.time_slots[0], 'yes'),
+        ])
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_rejects_time_slot_of_another_group(self):
+        foreign_slot = TimeSlot.objects.filter(date_option__date_group=self.other_group).first()
+        response = self.post_cells([self.cell(self.child, foreign_slot, 'yes')])
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_rejects_closed_group(self):
+        DateGroup.objects.filter(pk=self.date_group.pk).update(status='closed')
+        response = self.post_cells([self.cell(self.child, self.time_slots[0], 'yes')])
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_rejects_invalid_requests(self):
+        url = reverse('voting:vote_cells', args=[self.date_group.pk])
+        self.assertEqual(self.client.post(url, 'not json', content_type='application/json').status_code, 400)
+        self.assertEqual(self.post_cells([]).status_code, 400)
+        self.assertEqual(self.post_cells([{'child': self.child.pk}]).status_code, 400)
+        self.assertEqual(self.post_cells([self.cell(self.child, self.time_slots[0], 'perhaps')]).status_code, 400)
+        too_many = [
+            {'child': self.child.pk, 'time_slot': time_slot_id, 'choice': 'yes'}
+            for time_slot_id in range(1, MAX_AUTOSAVE_CELLS + 2)
+        ]
+        self.assertEqual(self.post_cells(too_many).status_code, 400)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_tallies_match_votes_after_mixed_batch(self):
+        first, second, third = self.time_slots[:3]
+        self.post_cells([
+            self.cell(self.child, first, 'yes'),
+            self.cell(self.child, second, 'no'),
+            self.cell(self.sibling, first, 'maybe'),
+        ])
+        # One creation, one update and one deletion in the same batch
+        response = self.post_cells([
+            self.cell(self.child, first, 'no'),
+            self.cell(self.child, second, ''),
+            self.cell(self.sibling, third, 'yes'),
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            (response.json()['created'], response.json()['updated'], response.json()['deleted']),
+            (1, 1, 1),
+        )
+        self.assertEqual(rebuild_tallies(dry_run=True), [])
+        tally = TimeSlotTally.objects.get(time_slot=first)
+        self.assertEqual((tally.yes_count, tally.no_count, tally.maybe_count), (0, 1, 1))
+        self.date_group.refresh_from_db()
+        self.assertEqual(self.date_group.total_votes, 3)
@@ -6,6 +6,7 @@ app_name = 'voting'
 urlpatterns = [
     path('', views.date_group_list, name='list'),
     path('<int:group_id>/vote/', views.vote_view, name='vote'),
+    path('<int:group_id>/vote/cells/', views.vote_cells_view, name='vote_cells'),
     path('<int:group_id>/results/', views.results_view, name='results'),
 ]
 
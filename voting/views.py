@@ -1,36 +1,46 @@
-from django.shortcuts import render, get_object_or_404, redirect
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.shortcuts import aget_object_or_404, render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils.translation import gettext as _
-from django.db.models import Q
+from django.core.paginator import Paginator
+from django.http import JsonResponse
+from django.views.decorators.http import require_POST
+import json
 from children.models import Child
+from daycare_project.decorators import resolve_user
 from .models import DateGroup, DateOption, TimeSlot, Vote
+from .statistics import aget_vote_matrix
+from .submission import VALID_CHOICES, save_vote_choices
+
+# Number of closed date groups shown per archive page
+ARCHIVE_PAGE_SIZE = 10
+
+# Maximum number of cells saved by one autosave request
+MAX_AUTOSAVE_CELLS = 500
+
+
+def get_archive_page(number):
+    """Return a page of closed date groups, with its groups loaded"""
+    archive_page = Paginator(
+        DateGroup.objects.filter(status='closed').with_voting_state(), ARCHIVE_PAGE_SIZE
+    ).get_page(number)
+    archive_page.object_list = list(archive_page.object_list)
+    return archive_page
 
 
 @login_required
-def date_group_list(request):
-    """List all active and closed date groups"""
-    date_groups = DateGroup.objects.filter(
-        Q(status='active') | Q(status='closed')
-    ).prefetch_related('date_options__time_slots')
-    children = Child.objects.filter(parent=request.user)
-    
-    # Get votes for each child for each group
-    user_votes_dict = {}
-    for group in date_groups:
-        group_votes = {}
-        for child in children:
-            votes = Vote.objects.filter(
-                child=child,
-                time_slot__date_option__date_group=group
-            ).select_related('time_slot', 'time_slot__date_option')
-            group_votes[child.id] = {vote.time_slot.id: vote.choice for vote in votes}
-        user_votes_dict[group.id] = group_votes
-    
+@resolve_user
+async def date_group_list(request):
+    """List active date groups, with closed ones in a paginated archive"""
+    # Close the groups past their closing date on the first display after it
+    await sync_to_async(DateGroup.objects.close_expired)()
+    active_groups = [group async for group in DateGroup.objects.filter(status='active').with_voting_state()]
+    archive_page = await sync_to_async(get_archive_page)(request.GET.get('archive_page'))
     context = {
-        'date_groups': date_groups,
-        'user_votes_dict': user_votes_dict,
-        'children': children,
+        'active_groups': active_groups,
+        'archive_page': archive_page,
     }
     return render(request, 'voting/date_group_list.html', context)
 
@@ -46,43 +56,26 @@ def vote_view(request, group_id):
         return redirect('voting:results', group_id=group_id)
     
     date_options = date_group.date_options.prefetch_related('time_slots')
-    children = Child.objects.filter(parent=request.user)
+    children = request.children
     
-    if not children.exists():
+    if not children:
         messages.warning(request, _('Vous devez enregistrer au moins un enfant avant de voter.'))
         return redirect('children:dashboard')
     
     if request.method == 'POST':
-        # Process votes for each child and each time slot
-        votes_created = 0
-        votes_updated = 0
-        votes_deleted = 0
-        
-        for child in children:
+        # Collect the posted choice for each child and each time slot. The
+        # children are read from the database: the cached list is only for
+        # display and may still hold a child just moved to another parent.
+        choices = {}
+        for child in Child.objects.filter(parent=request.user):
             for option in date_options:
                 for time_slot in option.time_slots.all():
                     choice_key = f'choice_{child.id}_{time_slot.id}'
-                    choice = request.POST.get(choice_key, '')
-                    
-                    if choice in ['yes', 'no', 'maybe']:
-                        vote, created = Vote.objects.update_or_create(
-                            time_slot=time_slot,
-                            child=child,
-                            defaults={'choice': choice}
-                        )
-                        if created:
-                            votes_created += 1
-                        else:
-                            votes_updated += 1
-                    elif choice == '':
-                        # Clear vote if empty value is selected
-                        deleted = Vote.objects.filter(
-                            time_slot=time_slot,
-                            child=child
-                        ).delete()[0]
-                        if deleted > 0:
-                            votes_deleted += 1
-        
+                    choices[(child.id, time_slot.id)] = request.POST.get(choice_key, '')
+
+        # Apply only the changes, in a single transaction
+        votes_created, votes_updated, votes_deleted = save_vote_choices(date_group, choices)
+
         if votes_created > 0 or votes_updated > 0:
             messages.success(request, _('Vos votes ont été enregistrés avec succès !'))
         elif votes_deleted > 0:
@@ -92,17 +85,14 @@ def vote_view(request, group_id):
         
         return redirect('voting:list')
     
-    # Get existing votes per child
-    existing_votes = {}
-    for child in children:
-        child_votes = {}
-        votes = Vote.objects.filter(
-            child=child,
-            time_slot__date_option__date_group=date_group
-        ).select_related('time_slot', 'time_slot__date_option')
-        for vote in votes:
-            child_votes[vote.time_slot.id] = vote.choice
-        existing_votes[child.id] = child_votes
+    # Get the existing votes of all the children in a single query, per child
+    existing_votes = {child.id: {} for child in children}
+    votes = Vote.objects.filter(
+        child_id__in=existing_votes,
+        time_slot__date_option__date_group=date_group
+    ).values_list('child_id', 'time_slot_id', 'choice')
+    for child_id, time_slot_id, choice in votes:
+        existing_votes[child_id][time_slot_id] = choice
     
     context = {
         'date_group': date_group,
@@ -114,20 +104,70 @@ def vote_view(request, group_id):
 
 
 @login_required
-def results_view(request, group_id):
-    """View voting results for a date group"""
+@require_POST
+def vote_cells_view(request, group_id):
+    """Save a few vote cells of a date group, sent as JSON by the vote page
+
+    The body is ``{"choices": [{"child": id, "time_slot": id, "choice": value}]}``
+    where value is one of VALID_CHOICES, or an empty string to clear the vote.
+    Returns the new choices of the cells, so the page does not need to reload.
+    """
     date_group = get_object_or_404(DateGroup, pk=group_id)
-    statistics = date_group.get_vote_statistics()
-    children = Child.objects.filter(parent=request.user)
-    user_votes = Vote.objects.filter(
-        child__in=children,
-        time_slot__date_option__date_group=date_group
-    ).select_related('child', 'time_slot', 'time_slot__date_option')
-    
+    if not date_group.can_vote():
+        return JsonResponse({'error': _('Ce groupe de dates est fermé. Vous ne pouvez plus voter.')}, status=403)
+
+    try:
+        cells = json.loads(request.body)['choices']
+        choices = {
+            (int(cell['child']), int(cell['time_slot'])): cell['choice']
+            for cell in cells
+        }
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'error': _('Requête invalide.')}, status=400)
+    if not choices or len(choices) > MAX_AUTOSAVE_CELLS:
+        return JsonResponse({'error': _('Requête invalide.')}, status=400)
+    if any(choice not in VALID_CHOICES and choice != '' for choice in choices.values()):
+        return JsonResponse({'error': _('Choix de vote invalide.')}, status=400)
+
+    # Only the children of the parent, and the time slots of this group, can be voted on
+    child_ids = {child_id for child_id, time_slot_id in choices}
+    time_slot_ids = {time_slot_id for child_id, time_slot_id in choices}
+    own_child_ids = set(Child.objects.filter(
+        parent=request.user, pk__in=child_ids
+    ).values_list('id', flat=True))
+    group_time_slot_ids = set(TimeSlot.objects.filter(
+        date_option__date_group=date_group, pk__in=time_slot_ids
+    ).values_list('id', flat=True))
+    if own_child_ids != child_ids or group_time_slot_ids != time_slot_ids:
+        return JsonResponse({'error': _('Vous ne pouvez pas voter pour ces créneaux.')}, status=403)
+
+    created, updated, deleted = save_vote_choices(date_group, choices)
+    return JsonResponse({
+        'choices': [
+            {'child': child_id, 'time_slot': time_slot_id, 'choice': choice}
+            for (child_id, time_slot_id), choice in choices.items()
+        ],
+        'created': created,
+        'updated': updated,
+        'deleted': deleted,
+    })
+
+
+@login_required
+@resolve_user
+async def results_view(request, group_id):
+    """View voting results for a date group"""
+    date_group = await aget_object_or_404(DateGroup, pk=group_id)
+    statistics = await sync_to_async(date_group.get_vote_statistics)()
+    children = await request.achildren()
+    vote_matrix = await aget_vote_matrix(date_group, children)
+
     context = {
         'date_group': date_group,
         'statistics': statistics,
         'children': children,
-        'user_votes': user_votes,
+        'vote_matrix': vote_matrix,
+        'periods': [period for period, label in TimeSlot.PERIOD_CHOICES],
+        'results_cache_timeout': settings.RESULTS_CACHE_TIMEOUT,
     }
     return render(request, 'voting/results.html', context)